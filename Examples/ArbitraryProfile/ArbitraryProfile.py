@@ -8,11 +8,9 @@ from zahner_potentiostat.scpi_control.datahandler import DataManager
 from zahner_potentiostat.scpi_control.datareceiver import TrackTypes
 from zahner_potentiostat.display.dcplot import DCPlot
 from zahner_potentiostat.display.onlinedisplay import OnlineDisplay
-from zahner_potentiostat.drivecycle.cycle_importer import (
-    getNormalisedCurrentTableForNYCCCOL,
-)
 
 from jupyter_utils import executionInNotebook
+from profile_utils import getDriveCycle, mergeEqualProfilePoints, arraysToProfile
 
 if __name__ == "__main__":
     deviceSearcher = SCPIDeviceSearcher()
@@ -50,8 +48,11 @@ if __name__ == "__main__":
 
     ZahnerPP2x2.setGlobalLimitCheckToleranceTime(1)
 
-    driveCycle = getNormalisedCurrentTableForNYCCCOL()
-    driveCycle = driveCycle[0:245]
+    profileTime, profileValue = getDriveCycle("NYCCCOL")
+    profileTime, profileValue = mergeEqualProfilePoints(
+        profileTime[0:245], profileValue[0:245]
+    )
+    driveCycle = arraysToProfile(profileTime, profileValue)
 
     ZahnerPP2x2.measureProfile(
         profileDict=driveCycle,
@@ -9,6 +9,8 @@ from zahner_potentiostat.scpi_control.datareceiver import TrackTypes
 from zahner_potentiostat.display.onlinedisplay import OnlineDisplay
 
 from jupyter_utils import executionInNotebook
+from analysis_utils import charge
+from data_utils import SegmentIndex, arrayToTracks, tracksToArray
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.ticker import EngFormatter
@@ -50,6 +52,7 @@ if __name__ == "__main__":
     cycles = len(currentsInCycles)
 
     ZahnerPP2x2.setParameterLimitCheckToleranceTime(0.1)
+    segments = SegmentIndex(dataReceiver)
 
     for i in range(cycles):
         print("cycle {} of {}".format(i + 1, cycles))
@@ -61,42 +64,44 @@ if __name__ == "__main__":
         ZahnerPP2x2.setVoltageParameterRelation(RELATION.ZERO)
         ZahnerPP2x2.setVoltageParameter(1)
         ZahnerPP2x2.setMaximumTimeParameter("60 s")
-        ZahnerPP2x2.measurePolarization()
-        dataReceiver.deletePoints()
+        with segments.record("polarization", cycle=i, voltage=1):
+            ZahnerPP2x2.measurePolarization()
 
         """
         Charge phase
         """
-        ZahnerPP2x2.measureCharge(
-            current=np.abs(currentsInCycles[i]), stopVoltage=2, maximumTime="4 min"
-        )
-
-        completeData = dataReceiver.getCompletePoints()
-        timeData = completeData[TrackTypes.TIME.toString()]
-        voltageData = completeData[TrackTypes.VOLTAGE.toString()]
-        currentData = completeData[TrackTypes.CURRENT.toString()]
-        dataReceiver.deletePoints()
-
-        timeChargeCycleData.append(timeData)
-        voltageChargeCycleData.append(voltageData)
-        currentChargeCycleData.append(currentData)
+        with segments.record("charge", cycle=i, current=np.abs(currentsInCycles[i])):
+            ZahnerPP2x2.measureCharge(
+                current=np.abs(currentsInCycles[i]), stopVoltage=2, maximumTime="4 min"
+            )
 
         """
         Discharge phase
         """
-        ZahnerPP2x2.measureDischarge(
-            current=-1 * np.abs(currentsInCycles[i]), stopVoltage=1, maximumTime="4 min"
-        )
+        with segments.record(
+            "discharge", cycle=i, current=-1 * np.abs(currentsInCycles[i])
+        ):
+            ZahnerPP2x2.measureDischarge(
+                current=-1 * np.abs(currentsInCycles[i]),
+                stopVoltage=1,
+                maximumTime="4 min",
+            )
+
+    completeData = arrayToTracks(tracksToArray(dataReceiver.getCompletePoints()))
 
-        completeData = dataReceiver.getCompletePoints()
-        timeData = completeData[TrackTypes.TIME.toString()]
-        voltageData = completeData[TrackTypes.VOLTAGE.toString()]
-        currentData = completeData[TrackTypes.CURRENT.toString()]
-        dataReceiver.deletePoints()
+    for segment in segments.getSegments("charge"):
+        chargeData = segments.getSegmentData(completeData, segment, relativeTime=True)
+        timeChargeCycleData.append(chargeData[TrackTypes.TIME.toString()])
+        voltageChargeCycleData.append(chargeData[TrackTypes.VOLTAGE.toString()])
+        currentChargeCycleData.append(chargeData[TrackTypes.CURRENT.toString()])
 
-        timeDischargeCycleData.append(timeData)
-        voltageDischargeCycleData.append(voltageData)
-        currentDischargeCycleData.append(currentData)
+    for segment in segments.getSegments("discharge"):
+        dischargeData = segments.getSegmentData(
+            completeData, segment, relativeTime=True
+        )
+        timeDischargeCycleData.append(dischargeData[TrackTypes.TIME.toString()])
+        voltageDischargeCycleData.append(dischargeData[TrackTypes.VOLTAGE.toString()])
+        currentDischargeCycleData.append(dischargeData[TrackTypes.CURRENT.toString()])
 
     if onlineDisplay != None:
         onlineDisplay.close()
@@ -107,30 +112,18 @@ if __name__ == "__main__":
     chargeWhileDischarging = []
 
     for cycle in range(cycles):
-        lastTimeStamp = 0
-        sumOfChargeInCycle = 0
-
-        for i in range(len(timeChargeCycleData[cycle])):
-            timeDelta = timeChargeCycleData[cycle][i] - lastTimeStamp
-            lastTimeStamp = timeChargeCycleData[cycle][i]
-            charge = currentChargeCycleData[cycle][i] * timeDelta
-
-            sumOfChargeInCycle += charge
-
-        chargeWhileCharging.append(sumOfChargeInCycle)
-
-    for cycle in range(cycles):
-        lastTimeStamp = 0
-        sumOfChargeInCycle = 0
-
-        for i in range(len(timeDischargeCycleData[cycle])):
-            timeDelta = timeDischargeCycleData[cycle][i] - lastTimeStamp
-            lastTimeStamp = timeDischargeCycleData[cycle][i]
-            charge = currentDischargeCycleData[cycle][i] * timeDelta
-
-            sumOfChargeInCycle += charge
-
-        chargeWhileDischarging.append(sumOfChargeInCycle)
+        chargeWhileCharging.append(
+            charge(
+                timeChargeCycleData[cycle], currentChargeCycleData[cycle], startTime=0
+            )
+        )
+        chargeWhileDischarging.append(
+            charge(
+                timeDischargeCycleData[cycle],
+                currentDischargeCycleData[cycle],
+                startTime=0,
+            )
+        )
 
     coulombicEfficiency = []
 
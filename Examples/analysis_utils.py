@@ -0,0 +1,530 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import functools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from zahner_potentiostat.scpi_control.datareceiver import TrackTypes
+from data_utils import loadDataFromText
+
+"""
+This module contains functions to evaluate the measured time, voltage and current tracks.
+
+All functions work on whole arrays with numpy, there are no loops over the single points in Python.
+The integrals are calculated with the trapezoidal rule from the first to the last point of the
+passed data. The primitive starts before its first point, the first point is measured one sampling
+period later. To include this time, the start time of the primitive can be passed to the functions,
+the current of the first point is then used from the start time to the first point.
+
+For GITT and PITT measurements the pulses and relaxations are detected from the current track and
+all steps are evaluated at once. Many files can be evaluated in parallel processes.
+"""
+
+
+def cumulativeCharge(time, current):
+    """Calculate the charge transferred up to every point.
+
+    :param time: Time track in s.
+    :param current: Current track in A.
+    :returns: Array with the charge in C, which starts with 0 at the first point.
+    :rtype: numpy.ndarray
+    """
+    time = np.asarray(time, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    charge = np.zeros(len(time))
+    if len(time) > 1:
+        charge[1:] = np.cumsum(np.diff(time) * (current[1:] + current[:-1]) / 2)
+    return charge
+
+
+def charge(time, current, startTime=None):
+    """Calculate the transferred charge.
+
+    :param time: Time track in s.
+    :param current: Current track in A.
+    :param startTime: Start time of the primitive in s, None to integrate from the first point.
+    :returns: The charge in C.
+    :rtype: float
+    """
+    time = np.asarray(time, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    result = np.sum(np.diff(time) * (current[1:] + current[:-1]) / 2)
+    if startTime is not None and len(time) > 0:
+        """
+        The current of the first point flows since the start of the primitive.
+        """
+        result += (time[0] - startTime) * current[0]
+    return float(result)
+
+
+def capacity(time, current, startTime=None):
+    """Calculate the transferred charge as capacity.
+
+    :param time: Time track in s.
+    :param current: Current track in A.
+    :param startTime: Start time of the primitive in s, None to integrate from the first point.
+    :returns: The capacity in Ah.
+    :rtype: float
+    """
+    return charge(time, current, startTime) / 3600
+
+
+def energy(time, voltage, current, startTime=None):
+    """Calculate the transferred energy.
+
+    :param time: Time track in s.
+    :param voltage: Voltage track in V.
+    :param current: Current track in A.
+    :param startTime: Start time of the primitive in s, None to integrate from the first point.
+    :returns: The energy in J.
+    :rtype: float
+    """
+    power = np.asarray(voltage, dtype=np.float64) * np.asarray(
+        current, dtype=np.float64
+    )
+    return charge(time, power, startTime)
+
+
+def coulombicEfficiency(chargeData, dischargeData, startTime=None):
+    """Calculate the coulombic efficiency of a cycle.
+
+    :param chargeData: Dictionary with the TrackTypes strings as keys of the charge phase.
+    :param dischargeData: Dictionary with the TrackTypes strings as keys of the discharge phase.
+    :param startTime: Start time of both phases in s, for example 0 for data from
+        SegmentIndex.getSegmentData() with relativeTime=True, None to integrate from the first
+        point of each phase.
+    :returns: The ratio of the discharge charge to the charge charge, 1 means 100 %.
+    :rtype: float
+    """
+    timeKey = TrackTypes.TIME.toString()
+    currentKey = TrackTypes.CURRENT.toString()
+    chargeCharge = charge(chargeData[timeKey], chargeData[currentKey], startTime)
+    dischargeCharge = charge(
+        dischargeData[timeKey], dischargeData[currentKey], startTime
+    )
+    return abs(dischargeCharge / chargeCharge)
+
+
+def energyEfficiency(chargeData, dischargeData, startTime=None):
+    """Calculate the energy efficiency of a cycle.
+
+    :param chargeData: Dictionary with the TrackTypes strings as keys of the charge phase.
+    :param dischargeData: Dictionary with the TrackTypes strings as keys of the discharge phase.
+    :param startTime: Start time of both phases in s, None to integrate from the first point of
+        each phase.
+    :returns: The ratio of the discharge energy to the charge energy, 1 means 100 %.
+    :rtype: float
+    """
+    timeKey = TrackTypes.TIME.toString()
+    voltageKey = TrackTypes.VOLTAGE.toString()
+    currentKey = TrackTypes.CURRENT.toString()
+    chargeEnergy = energy(
+        chargeData[timeKey], chargeData[voltageKey], chargeData[currentKey], startTime
+    )
+    dischargeEnergy = energy(
+        dischargeData[timeKey],
+        dischargeData[voltageKey],
+        dischargeData[currentKey],
+        startTime,
+    )
+    return abs(dischargeEnergy / chargeEnergy)
+
+
+def voltageSlope(time, voltage):
+    """Calculate the derivative dV/dt.
+
+    :param time: Time track in s.
+    :param voltage: Voltage track in V.
+    :returns: Array with dV/dt in V/s for every point.
+    :rtype: numpy.ndarray
+    """
+    return np.gradient(
+        np.asarray(voltage, dtype=np.float64), np.asarray(time, dtype=np.float64)
+    )
+
+
+def differentialCapacity(time, voltage, current, voltageStep=0.005):
+    """Calculate the differential capacity dQ/dV.
+
+    The charge of every sampling interval is summed up in voltage bins of the width voltageStep.
+    Dividing by the bin width results in dQ/dV. Because of the binning, the noise of the voltage
+    does not lead to a division by almost zero like a point by point derivative.
+
+    :param time: Time track in s.
+    :param voltage: Voltage track in V.
+    :param current: Current track in A.
+    :param voltageStep: Width of the voltage bins in V.
+    :returns: Two arrays, the voltages of the bin centers in V and dQ/dV in F.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    voltage = np.asarray(voltage, dtype=np.float64)
+    chargeSteps = np.diff(cumulativeCharge(time, current))
+    intervalVoltage = (voltage[1:] + voltage[:-1]) / 2
+
+    start = np.floor(np.min(voltage) / voltageStep) * voltageStep
+    bins = np.arange(start, np.max(voltage) + voltageStep, voltageStep)
+    if len(bins) < 2:
+        bins = np.array([start, start + voltageStep])
+    chargeInBins, edges = np.histogram(intervalVoltage, bins=bins, weights=chargeSteps)
+    return (edges[1:] + edges[:-1]) / 2, chargeInBins / voltageStep
+
+
+class ChargeIntegrator:
+    """Integrate charge and energy incrementally while measuring.
+
+    The integrator remembers how many points were already processed. With every call of
+    update() only the new points of the data from the DataReceiver are integrated. When a primitive
+    returns, the charge and energy of all points received so far is ready without integrating the
+    whole history again.
+
+    Like charge(), the integration can start at the start time of the primitive instead of the
+    first point. The time of the DataReceiver starts at 0, so startTime=0 gives the same result as
+    charge(time, current, startTime=0) for the first primitive.
+
+    .. code-block:: python
+
+        integrator = ChargeIntegrator(startTime=0)
+        ZahnerPP2x2.measureCharge(current=1, stopVoltage=2, maximumTime="4 min")
+        integrator.update(dataReceiver.getCompletePoints())
+        print(integrator.getCharge())
+
+    :param startTime: Start time of the integration in s, None to start with the first point.
+    """
+
+    def __init__(self, startTime=None):
+        self.reset(startTime)
+
+    def reset(self, startTime=None):
+        """Reset the integrated values.
+
+        :param startTime: Start time of the integration in s, None to start with the next point.
+        """
+        self._processedPoints = 0
+        self._lastPoint = None
+        self._initialStartTime = startTime
+        self._startTime = startTime
+        self._charge = 0.0
+        self._energy = 0.0
+        return
+
+    def update(self, data):
+        """Integrate the new points of the data.
+
+        Only the points after the already processed points are converted and integrated. Note that
+        getCompletePoints() itself copies all points of the DataReceiver, so this copy still grows
+        with the number of points in the DataReceiver.
+
+        If the time of the last processed point is no longer contained at its position in the data,
+        or the time of the next point is not after it, the points were deleted in the meantime and the
+        integration continues with the first point of the data. Data measured after deletePoints()
+        can look exactly like a continuation of the processed points, therefore call pointsDeleted()
+        after dataReceiver.deletePoints() instead of relying on this detection.
+
+        :param data: Dictionary with the TrackTypes strings as keys, like getCompletePoints() returns.
+        """
+        timeTrack = data[TrackTypes.TIME.toString()]
+        voltageTrack = data[TrackTypes.VOLTAGE.toString()]
+        currentTrack = data[TrackTypes.CURRENT.toString()]
+        numberOfPoints = len(timeTrack)
+
+        if self._processedPoints > 0:
+            last = self._processedPoints - 1
+            if (
+                numberOfPoints < self._processedPoints
+                or np.array_equal(timeTrack[last], self._lastPoint[0], equal_nan=True)
+                == False
+                or (
+                    numberOfPoints > self._processedPoints
+                    and timeTrack[self._processedPoints] <= self._lastPoint[0]
+                )
+            ):
+                self.pointsDeleted()
+
+        start = self._processedPoints
+        self.addPoints(timeTrack[start:], voltageTrack[start:], currentTrack[start:])
+        self._processedPoints = numberOfPoints
+        return
+
+    def pointsDeleted(self, startTime=None):
+        """Inform the integrator that the points of the DataReceiver were deleted.
+
+        The integrated values are kept. The next call of update() integrates the data from its first
+        point, without a connection to the last processed point, because the time axis of the
+        DataReceiver starts again.
+
+        :param startTime: Start time of the next primitive in s, None for the start time passed to
+            reset() or the constructor, because the time of the DataReceiver starts again at 0.
+        """
+        self._processedPoints = 0
+        self._lastPoint = None
+        self._startTime = self._initialStartTime if startTime is None else startTime
+        return
+
+    def addPoints(self, time, voltage, current):
+        """Integrate new points, which follow the previously added points.
+
+        :param time: Time track in s.
+        :param voltage: Voltage track in V.
+        :param current: Current track in A.
+        """
+        time = np.asarray(time, dtype=np.float64)
+        voltage = np.asarray(voltage, dtype=np.float64)
+        current = np.asarray(current, dtype=np.float64)
+        if len(time) == 0:
+            return
+
+        if self._lastPoint is not None:
+            lastTime, lastVoltage, lastCurrent = self._lastPoint
+            time = np.concatenate(([lastTime], time))
+            voltage = np.concatenate(([lastVoltage], voltage))
+            current = np.concatenate(([lastCurrent], current))
+
+        startTime = self._startTime if self._lastPoint is None else None
+        self._charge += charge(time, current, startTime)
+        self._energy += energy(time, voltage, current, startTime)
+        self._lastPoint = (float(time[-1]), float(voltage[-1]), float(current[-1]))
+        return
+
+    def getCharge(self):
+        """Get the integrated charge.
+
+        :returns: The charge in C.
+        :rtype: float
+        """
+        return self._charge
+
+    def getCapacity(self):
+        """Get the integrated charge as capacity.
+
+        :returns: The capacity in Ah.
+        :rtype: float
+        """
+        return self._charge / 3600
+
+    def getEnergy(self):
+        """Get the integrated energy.
+
+        :returns: The energy in J.
+        :rtype: float
+        """
+        return self._energy
+
+
+def findPulses(current, currentThreshold=1e-6):
+    """Find the pulses with current flow and the following relaxations.
+
+    A point belongs to a pulse if the absolute current is greater than currentThreshold. During the
+    open circuit relaxation of GITT and PITT measurements the current is zero.
+
+    :param current: Current track in A.
+    :param currentThreshold: Absolute current in A above which a point belongs to a pulse.
+    :returns: Three arrays with the index of the first point of each pulse, the index after the last
+        point of each pulse and the index after the last point of the following relaxation.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+    """
+    pulse = (np.abs(np.asarray(current, dtype=np.float64)) > currentThreshold).astype(
+        np.int8
+    )
+    edges = np.diff(pulse, prepend=0, append=0)
+    pulseStart = np.flatnonzero(edges == 1)
+    pulseEnd = np.flatnonzero(edges == -1)
+    relaxationEnd = np.append(pulseStart[1:], len(pulse))
+    return pulseStart, pulseEnd, relaxationEnd
+
+
+def _evaluatePulses(data, currentThreshold):
+    """Evaluate the quantities which GITT and PITT have in common for all pulses.
+
+    The pulse is switched on after the last relaxation point before the pulse and switched off after
+    its last point. The charge is integrated from the last point before to the first point after the
+    pulse, so that with the trapezoidal rule it is exactly current times duration for a constant
+    current.
+    """
+    time = np.asarray(data[TrackTypes.TIME.toString()], dtype=np.float64)
+    voltage = np.asarray(data[TrackTypes.VOLTAGE.toString()], dtype=np.float64)
+    current = np.asarray(data[TrackTypes.CURRENT.toString()], dtype=np.float64)
+
+    pulseStart, pulseEnd, relaxationEnd = findPulses(current, currentThreshold)
+    switchOn = np.maximum(pulseStart - 1, 0)
+    switchOff = np.minimum(pulseEnd, len(time) - 1)
+    chargeTrack = cumulativeCharge(time, current)
+
+    return {
+        "pulseStart": pulseStart,
+        "pulseEnd": pulseEnd,
+        "relaxationEnd": relaxationEnd,
+        "duration": time[pulseEnd - 1] - time[switchOn],
+        "charge": chargeTrack[switchOff] - chargeTrack[switchOn],
+        "restVoltage": voltage[switchOn],
+        "pulseEndVoltage": voltage[pulseEnd - 1],
+        "relaxedVoltage": voltage[relaxationEnd - 1],
+    }, (time, voltage, current)
+
+
+def analyseGITT(
+    data,
+    currentThreshold=1e-6,
+    mass=None,
+    molarMass=None,
+    molarVolume=None,
+    area=None,
+):
+    """Evaluate all steps of a GITT measurement.
+
+    The following values are calculated for each pulse and returned as arrays in a dictionary:
+
+    * pulseStart, pulseEnd, relaxationEnd: Indices of the pulse and relaxation, see findPulses().
+    * duration: Duration of the pulse in s.
+    * charge: Transferred charge in C.
+    * restVoltage: Relaxed voltage before the pulse in V.
+    * irDrop: Voltage jump from the rest voltage to the first point of the pulse in V.
+    * deltaEt: Voltage change during the pulse without the IR drop in V.
+    * deltaEs: Change of the relaxed voltage by the step in V.
+    * diffusionCoefficient: Diffusion coefficient according to Weppner and Huggins.
+
+    The diffusion coefficient is only calculated if mass, molarMass, molarVolume and area are passed,
+    otherwise it is NaN. The unit results from the units of the parameters, with molarVolume in
+    cm³/mol and area in cm² it is cm²/s.
+
+    :math:`D = \\frac{4}{\\pi \\tau} \\left(\\frac{m V_M}{M S}\\right)^2 \\left(\\frac{\\Delta E_s}{\\Delta E_t}\\right)^2`
+
+    The formula is valid for pulses much shorter than the diffusion time of the electrode.
+
+    :param data: Dictionary with the TrackTypes strings as keys, like getCompletePoints() returns.
+    :param currentThreshold: Absolute current in A above which a point belongs to a pulse.
+    :param mass: Mass of the active material.
+    :param molarMass: Molar mass of the active material.
+    :param molarVolume: Molar volume of the active material.
+    :param area: Electrode area.
+    :returns: Dictionary with one array for each value.
+    :rtype: dict
+    """
+    result, (time, voltage, current) = _evaluatePulses(data, currentThreshold)
+
+    firstPulseVoltage = voltage[result["pulseStart"]]
+    result["irDrop"] = firstPulseVoltage - result["restVoltage"]
+    result["deltaEt"] = result["pulseEndVoltage"] - firstPulseVoltage
+    result["deltaEs"] = result["relaxedVoltage"] - result["restVoltage"]
+
+    if None in [mass, molarMass, molarVolume, area]:
+        result["diffusionCoefficient"] = np.full(len(result["pulseStart"]), np.nan)
+    else:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result["diffusionCoefficient"] = (
+                4
+                / (np.pi * result["duration"])
+                * (mass * molarVolume / (molarMass * area)) ** 2
+                * (result["deltaEs"] / result["deltaEt"]) ** 2
+            )
+    return result
+
+
+def analysePITT(data, currentThreshold=1e-6, diffusionLength=None, fitFraction=0.5):
+    """Evaluate all steps of a PITT measurement.
+
+    The following values are calculated for each pulse and returned as arrays in a dictionary:
+
+    * pulseStart, pulseEnd, relaxationEnd: Indices of the pulse and relaxation, see findPulses().
+    * duration: Duration of the pulse in s.
+    * charge: Transferred charge in C.
+    * restVoltage: Relaxed voltage before the pulse in V.
+    * voltageStep: Voltage step from the rest voltage to the pulse voltage in V.
+    * decayRate: Slope of ln(|I|) over time at the end of the pulse in 1/s.
+    * diffusionCoefficient: Diffusion coefficient from the long time current decay.
+
+    For long times the current decays with :math:`I \\propto \\exp(-\\pi^2 D t / (4 L^2))`.
+    The decay rate is fitted with linear regression over the last fitFraction of the points of each
+    pulse. The diffusion coefficient is only calculated if diffusionLength is passed, otherwise it is
+    NaN. With the diffusion length in cm it is in cm²/s.
+
+    :param data: Dictionary with the TrackTypes strings as keys, like getCompletePoints() returns.
+    :param currentThreshold: Absolute current in A above which a point belongs to a pulse.
+    :param diffusionLength: Diffusion length L of the electrode.
+    :param fitFraction: Fraction of the pulse points at the end used for the fit.
+    :returns: Dictionary with one array for each value.
+    :rtype: dict
+    """
+    result, (time, voltage, current) = _evaluatePulses(data, currentThreshold)
+    pulseStart = result["pulseStart"]
+    pulseEnd = result["pulseEnd"]
+
+    result["voltageStep"] = voltage[pulseStart] - result["restVoltage"]
+
+    """
+    Linear regression of all pulses at once, the sums are calculated per pulse with bincount.
+    """
+    fitLength = np.maximum(
+        np.round((pulseEnd - pulseStart) * fitFraction).astype(np.int64), 2
+    )
+    fitLength = np.minimum(fitLength, pulseEnd - pulseStart)
+    fitStart = pulseEnd - fitLength
+    pulseIndex = np.repeat(np.arange(len(pulseStart)), fitLength)
+    pointIndex = np.arange(np.sum(fitLength)) - np.repeat(
+        np.cumsum(fitLength) - fitLength, fitLength
+    )
+    pointIndex += np.repeat(fitStart, fitLength)
+
+    x = time[pointIndex]
+    y = np.log(np.abs(current[pointIndex]))
+    numberOfBins = len(pulseStart)
+    n = np.bincount(pulseIndex, minlength=numberOfBins)
+    sumX = np.bincount(pulseIndex, x, minlength=numberOfBins)
+    sumY = np.bincount(pulseIndex, y, minlength=numberOfBins)
+    sumXX = np.bincount(pulseIndex, x * x, minlength=numberOfBins)
+    sumXY = np.bincount(pulseIndex, x * y, minlength=numberOfBins)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result["decayRate"] = (n * sumXY - sumX * sumY) / (n * sumXX - sumX * sumX)
+
+    if diffusionLength is None:
+        result["diffusionCoefficient"] = np.full(numberOfBins, np.nan)
+    else:
+        result["diffusionCoefficient"] = (
+            -4 * diffusionLength**2 * result["decayRate"] / np.pi**2
+        )
+    return result
+
+
+def analyseFiles(textFilenames, method="GITT", processes=None, **parameters):
+    """Evaluate many GITT or PITT files saved with saveDataAsText() in parallel processes.
+
+    :param textFilenames: List with the paths of the text files.
+    :param method: "GITT" or "PITT".
+    :param processes: The number of worker processes, None for the number of processors.
+    :param parameters: Parameters passed to analyseGITT() or analysePITT().
+    :returns: List with the result dictionary of each file, in the order of the files.
+    :rtype: list[dict]
+    """
+    analyse = {"GITT": analyseGITT, "PITT": analysePITT}[method]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(
+            executor.map(
+                functools.partial(_analyseFile, analyse, parameters), textFilenames
+            )
+        )
+
+
+def _analyseFile(analyse, parameters, textFilename):
+    return analyse(loadDataFromText(textFilename), **parameters)
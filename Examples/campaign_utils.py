@@ -0,0 +1,275 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import json
+import os
+import time
+from serial import SerialException
+from zahner_potentiostat.scpi_control.searcher import SCPIDeviceSearcher
+from zahner_potentiostat.scpi_control.datareceiver import TrackTypes
+from zahner_potentiostat.scpi_control.error import ZahnerConnectionError
+from data_utils import SegmentIndex, saveDataAsText
+from multi_device_utils import openDevice
+
+"""
+This module contains a runner for long measurement campaigns, which can be resumed.
+
+A campaign is a list of steps, each step is a function which executes one or more primitives.
+After every step the measured points are appended to a text file and the position in the campaign
+is saved in a checkpoint file. If the connection to the device is interrupted, the device is
+searched again by its serial number and the interrupted step is repeated. If the script itself
+was terminated, for example by a restart of the computer, the campaign continues after the
+last completed step when it is started again with the same checkpoint file. Points which were
+appended to the text file after the last checkpoint are removed again before it continues.
+"""
+
+CONNECTION_ERRORS = (ZahnerConnectionError, SerialException)
+
+
+class Campaign:
+    """Resumable sequence of measurement steps on one device.
+
+    The setup function is called after every connection to the device, also after a reconnection.
+    It must set all parameters which the steps rely on, because the parameters of the device may
+    have been lost. A step is repeated completely after an interruption, the points measured in
+    the interrupted step are discarded.
+
+    The time track of the saved data continues over all steps. The time during which the device
+    was not connected is not visible in the time track.
+
+    .. code-block:: python
+
+        def setup(device):
+            device.clearState()
+            device.setRaiseOnErrorEnabled(True)
+            device.setSamplingFrequency(5)
+
+        def charge(device):
+            device.measureCharge(current=1, stopVoltage=4.2, maximumTime="2 h")
+
+        def discharge(device):
+            device.measureDischarge(current=-1, stopVoltage=3.0, maximumTime="2 h")
+
+        steps = [("charge", charge), ("discharge", discharge)] * 500
+        campaign = Campaign("35000", steps, "campaign.json", "campaign.txt", setup)
+        campaign.run()
+
+    :param serialNumber: The serial number of the device as `str` or `int`.
+    :param steps: List with tuples (name, function), the function is called with the
+        :class:`~zahner_potentiostat.scpi_control.control.SCPIDevice` as parameter.
+    :param checkpointFilename: The path of the JSON checkpoint file.
+    :param dataFilename: The path of the text file for the measured data.
+    :param setup: Function called with the device after every connection, or None.
+    :param reconnectInterval: Time in s between two attempts to reconnect.
+    :param maximumReconnectAttempts: Number of failed attempts in a row after which the campaign is
+        aborted with the last exception, None to try forever. This also applies to the first
+        connection, so a campaign resumed after a restart of the computer waits for the device.
+    """
+
+    def __init__(
+        self,
+        serialNumber,
+        steps,
+        checkpointFilename,
+        dataFilename,
+        setup=None,
+        reconnectInterval=10,
+        maximumReconnectAttempts=None,
+    ):
+        self._serialNumber = str(serialNumber)
+        self._steps = steps
+        self._checkpointFilename = checkpointFilename
+        self._dataFilename = dataFilename
+        self._setup = setup
+        self._reconnectInterval = reconnectInterval
+        self._maximumReconnectAttempts = maximumReconnectAttempts
+        self._numberOfReconnects = 0
+
+    def run(self):
+        """Execute the campaign from the last checkpoint until all steps are completed."""
+        state = self._prepareData(self.loadCheckpoint())
+        device = self._connectRepeatedly(False)
+        try:
+            while state["nextStep"] < len(self._steps):
+                name, step = self._steps[state["nextStep"]]
+                try:
+                    step(device)
+                except CONNECTION_ERRORS:
+                    device = self._reconnect(device)
+                    continue
+                self._saveStep(device, name, state)
+        finally:
+            device.close()
+        return
+
+    def loadCheckpoint(self):
+        """Load the checkpoint or create the state for a new campaign.
+
+        :returns: Dictionary with the state of the campaign.
+        :rtype: dict
+        """
+        if os.path.exists(self._checkpointFilename) == False:
+            return {
+                "serialNumber": self._serialNumber,
+                "nextStep": 0,
+                "numberOfPoints": 0,
+                "lastTime": 0.0,
+                "dataSize": 0,
+                "segments": [],
+            }
+
+        with open(self._checkpointFilename, "r", encoding="utf-8") as file:
+            state = json.load(file)
+        if state["serialNumber"] != self._serialNumber:
+            raise ValueError(
+                f"checkpoint {self._checkpointFilename} belongs to device {state['serialNumber']}"
+            )
+        return state
+
+    def getSegmentIndex(self):
+        """Get the segments of the completed steps in the saved data.
+
+        :returns: Index with one segment for each completed step, named like the step.
+        :rtype: :class:`~data_utils.SegmentIndex`
+        """
+        segments = SegmentIndex(None)
+        for segment in self.loadCheckpoint()["segments"]:
+            segments.addSegment(
+                segment["name"], segment["start"], segment["end"], step=segment["step"]
+            )
+        return segments
+
+    def getNumberOfReconnects(self):
+        """Get the number of successful reconnections since the object was created.
+
+        :returns: Number of reconnections.
+        :rtype: int
+        """
+        return self._numberOfReconnects
+
+    def _prepareData(self, state):
+        """Bring the data file to the state of the checkpoint.
+
+        For a new campaign the checkpoint is written before the first step, so that points of an
+        interrupted first step can also be removed. A data file without checkpoint is not
+        overwritten.
+        """
+        dataExists = (
+            os.path.exists(self._dataFilename)
+            and os.path.getsize(self._dataFilename) > 0
+        )
+        if os.path.exists(self._checkpointFilename) == False:
+            if dataExists:
+                raise ValueError(
+                    f"data file {self._dataFilename} exists without checkpoint"
+                )
+            self._saveCheckpoint(state)
+        elif dataExists and os.path.getsize(self._dataFilename) > state["dataSize"]:
+            """
+            The points of a step which was interrupted after writing the data, but before writing
+            the checkpoint, are removed. Otherwise the segments would not match the data.
+            """
+            with open(self._dataFilename, "r+b") as file:
+                file.truncate(state["dataSize"])
+        return state
+
+    def _saveStep(self, device, name, state):
+        """Append the points of the completed step to the data file and save the checkpoint.
+
+        The data is written before the checkpoint. If the script is terminated in between, the data
+        file is truncated to the size stored in the checkpoint and the step is repeated.
+        """
+        dataReceiver = device.getDataReceiver()
+        data = dataReceiver.getCompletePoints()
+        dataReceiver.deletePoints()
+
+        numberOfPoints = len(data[TrackTypes.TIME.toString()])
+        lastTime = saveDataAsText(
+            self._dataFilename, data, append=True, timeOffset=state["lastTime"]
+        )
+
+        state["segments"].append(
+            {
+                "name": name,
+                "step": state["nextStep"],
+                "start": state["numberOfPoints"],
+                "end": state["numberOfPoints"] + numberOfPoints,
+            }
+        )
+        state["numberOfPoints"] += numberOfPoints
+        state["lastTime"] = lastTime
+        state["dataSize"] = os.path.getsize(self._dataFilename)
+        state["nextStep"] += 1
+        self._saveCheckpoint(state)
+        return
+
+    def _saveCheckpoint(self, state):
+        temporaryFilename = self._checkpointFilename + ".tmp"
+        with open(temporaryFilename, "w", encoding="utf-8") as file:
+            json.dump(state, file, indent=1)
+        os.replace(temporaryFilename, self._checkpointFilename)
+        return
+
+    def _connect(self):
+        deviceSearcher = SCPIDeviceSearcher()
+        deviceSearcher.searchZahnerDevices()
+        commandPort, dataPort = deviceSearcher.selectDevice(self._serialNumber)
+        device = openDevice(commandPort, dataPort)
+        try:
+            if self._setup is not None:
+                self._setup(device)
+        except:
+            device.close()
+            raise
+        return device
+
+    def _connectRepeatedly(self, waitFirst):
+        failedAttempts = 0
+        while True:
+            if waitFirst or failedAttempts > 0:
+                time.sleep(self._reconnectInterval)
+            try:
+                return self._connect()
+            except CONNECTION_ERRORS:
+                failedAttempts += 1
+                if (
+                    self._maximumReconnectAttempts is not None
+                    and failedAttempts >= self._maximumReconnectAttempts
+                ):
+                    raise
+
+    def _reconnect(self, device):
+        try:
+            device.close()
+        except:
+            """
+            The connection is already interrupted, so closing may fail.
+            """
+            pass
+
+        device = self._connectRepeatedly(True)
+        self._numberOfReconnects += 1
+        return device
@@ -0,0 +1,684 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import contextlib
+import json
+import struct
+import zlib
+import numpy as np
+from zahner_potentiostat.scpi_control.datareceiver import TrackTypes
+
+"""
+This module contains functions to save and load the measured time, voltage and current tracks.
+
+The text format is the same as the one written by DataManager.saveDataAsText() of the
+zahner_potentiostat package, so files written by the package and by this module can be mixed.
+The data is passed and returned as a dictionary with the TrackTypes strings as keys, like the
+dictionary returned by DataReceiver.getCompletePoints().
+
+With the SegmentIndex the start and end of every primitive in the recorded data is stored, so the
+points do not have to be deleted between the primitives to separate the phases of a measurement.
+
+For archiving, saveDataAsBinary() writes a compressed binary file, which is much smaller than the
+text file and can be read partially by a time range with loadDataFromBinary().
+
+For long measurements, appendDataToRecording() appends the points of every primitive to a
+recording file, so the points can be deleted in the DataReceiver and a crash only loses the
+current primitive. openRecording() opens a finished or partial recording as memory-mapped arrays
+without reading the file.
+
+With deadbandDecimate() the points of quiet phases can be removed before saving, only points at
+which the voltage or current changes are kept.
+"""
+
+TEXT_HEADER = "Time [s];\tVoltage [V];\tCurrent [A]\n"
+TEXT_LINE_FORMAT = "{:+.16E};\t{:+.16E};\t{:+.16E}\n"
+TEXT_CHUNK_SIZE = 100000
+
+TRACK_KEYS = [
+    TrackTypes.TIME.toString(),
+    TrackTypes.VOLTAGE.toString(),
+    TrackTypes.CURRENT.toString(),
+]
+
+BINARY_MAGIC = b"ZTRACKS1"
+BINARY_CHUNK_SIZE = 100000
+
+RECORDING_MAGIC = b"ZRECORD1"
+
+
+def tracksToArray(data):
+    """Convert the track dictionary into a two dimensional array.
+
+    :param data: Dictionary with the TrackTypes strings as keys and lists or arrays as values.
+    :returns: Array with the shape (number of points, 3) and the columns time, voltage, current.
+    :rtype: numpy.ndarray
+    """
+    return np.column_stack(
+        [np.asarray(data[key], dtype=np.float64) for key in TRACK_KEYS]
+    )
+
+
+def arrayToTracks(array):
+    """Convert a two dimensional array into the track dictionary.
+
+    The values of the dictionary are views of the columns of the array.
+
+    :param array: Array with the columns time, voltage, current.
+    :returns: Dictionary with the TrackTypes strings as keys.
+    :rtype: dict
+    """
+    return {key: array[:, column] for column, key in enumerate(TRACK_KEYS)}
+
+
+def saveDataAsText(
+    filename, data, append=False, timeOffset=0.0, chunkSize=TEXT_CHUNK_SIZE
+):
+    """Save the data in the text format of DataManager.saveDataAsText().
+
+    Instead of formatting every point on its own, blocks of chunkSize points are formatted with
+    a single format call and written at once. The values are converted to Python floats first,
+    because formatting numpy scalars is slower.
+
+    With append=True the points are appended to an existing file. This way the data can be written
+    in parts during the acquisition, for example after every primitive, followed by
+    dataReceiver.deletePoints(). The header is only written if the file does not exist yet or
+    is empty.
+
+    After dataReceiver.deletePoints() the time of the DataReceiver starts again at 0. To get a
+    continuous time track in the file, the returned time of the last written point is passed as
+    timeOffset for the next part:
+
+    .. code-block:: python
+
+        timeOffset = 0.0
+        for i in range(cycles):
+            ZahnerPP2x2.measurePolarization()
+            timeOffset = saveDataAsText(
+                "cycles.txt", dataReceiver.getCompletePoints(), True, timeOffset
+            )
+            dataReceiver.deletePoints()
+
+    :param filename: The path and name of the text file.
+    :param data: Dictionary with the TrackTypes strings as keys, like getCompletePoints() returns.
+    :param append: True to append the points to an existing file.
+    :param timeOffset: Time in s which is added to the time track.
+    :param chunkSize: Number of points which are formatted and written at once.
+    :returns: The time of the last written point in the file, timeOffset if there are no points.
+    :rtype: float
+    """
+    array = tracksToArray(data)
+    array[:, 0] += timeOffset
+    writeHeader = (
+        append == False
+        or os.path.exists(filename) == False
+        or os.path.getsize(filename) == 0
+    )
+
+    with open(filename, "ab" if append else "wb") as file:
+        if writeHeader:
+            file.write(TEXT_HEADER.encode("utf-8"))
+        for start in range(0, len(array), chunkSize):
+            chunk = array[start : start + chunkSize]
+            text = (TEXT_LINE_FORMAT * len(chunk)).format(*chunk.ravel().tolist())
+            file.write(text.encode("utf-8"))
+
+    if len(array) == 0:
+        return float(timeOffset)
+    return float(array[-1, 0])
+
+
+def loadDataFromText(filename):
+    """Load a file written with saveDataAsText().
+
+    The whole file is read at once and parsed by numpy without a loop in Python.
+
+    If the last line is incomplete, for example because the script was terminated while appending
+    to the file, this line is ignored.
+
+    :param filename: The path and name of the text file.
+    :returns: Dictionary with the TrackTypes strings as keys and numpy arrays as values.
+    :rtype: dict
+    """
+    with open(filename, "r", encoding="utf-8") as file:
+        file.readline()
+        text = file.read()
+    if text.endswith("\n") == False:
+        text = text[: text.rfind("\n") + 1]
+
+    values = np.fromstring(text.replace(";", " "), dtype=np.float64, sep=" ")
+    if len(values) % len(TRACK_KEYS) != 0:
+        raise ValueError(f"{filename} has an incomplete line")
+    return arrayToTracks(values.reshape(-1, len(TRACK_KEYS)))
+
+
+def _encodeColumn(values, resolution):
+    """Delta encode and compress one column of a chunk.
+
+    Without resolution the bit patterns of the 64 bit floats are used as integers, which is
+    lossless. For neighbouring values with the same sign and exponent the differences of the bit
+    patterns are small. With a resolution the values are quantized to multiples of it.
+
+    The bytes of the 64 bit differences are sorted by their significance before the compression,
+    the upper bytes are nearly all equal and compress well.
+    """
+    if resolution is None:
+        integers = np.ascontiguousarray(values, dtype=np.float64).view(np.int64)
+    else:
+        integers = np.rint(values / resolution).astype(np.int64)
+    differences = np.diff(integers, prepend=np.int64(0))
+    shuffled = differences.view(np.uint8).reshape(-1, 8).T
+    return zlib.compress(shuffled.tobytes())
+
+
+def _decodeColumn(compressed, resolution, numberOfPoints):
+    shuffled = np.frombuffer(zlib.decompress(compressed), dtype=np.uint8)
+    differences = shuffled.reshape(8, numberOfPoints).T.copy().view(np.int64).ravel()
+    integers = np.cumsum(differences)
+    if resolution is None:
+        return integers.view(np.float64)
+    return integers * resolution
+
+
+def saveDataAsBinary(
+    filename,
+    data,
+    metadata=None,
+    timeResolution=None,
+    voltageResolution=None,
+    currentResolution=None,
+    chunkSize=BINARY_CHUNK_SIZE,
+):
+    """Save the data compressed in a binary file.
+
+    The points are split into chunks of chunkSize points. In every chunk the time, voltage and
+    current are stored as separate columns. The differences of neighbouring points are stored and
+    compressed with zlib.
+
+    By default the values are stored without loss, the loaded values are exactly the saved values.
+    A resolution can be passed for each track to quantize the values to multiples of it, for
+    example the resolution of the used current range. This makes the file smaller, but values
+    below the resolution are lost, so it must only be used if the whole track is measured with
+    the same or a coarser resolution.
+
+    The file contains an index with the minimum and maximum time of every chunk at the end, which
+    allows to read only the chunks of a time range. This works best with a monotonic time track,
+    like it is without deleting the points in the DataReceiver or with the time offset of
+    saveDataAsText() and the Campaign.
+
+    .. code-block:: python
+
+        saveDataAsBinary(
+            "gitt.ztr",
+            dataReceiver.getCompletePoints(),
+            {"serialNumber": "35000", "primitive": "GITT", "current": 1.0},
+        )
+
+    :param filename: The path and name of the binary file.
+    :param data: Dictionary with the TrackTypes strings as keys, like getCompletePoints() returns.
+    :param metadata: Dictionary with information about the measurement, for example the serial
+        number of the device and the parameters of the primitives. It must be serializable to JSON.
+    :param timeResolution: Resolution of the time in s, None to store it without loss.
+    :param voltageResolution: Resolution of the voltage in V, None to store it without loss.
+    :param currentResolution: Resolution of the current in A, None to store it without loss.
+    :param chunkSize: Number of points in one chunk.
+    """
+    array = tracksToArray(data)
+    resolutions = [
+        None if resolution is None else float(resolution)
+        for resolution in [timeResolution, voltageResolution, currentResolution]
+    ]
+    for column, resolution in enumerate(resolutions):
+        if resolution is not None and np.all(np.isfinite(array[:, column])) == False:
+            raise ValueError("only finite values can be stored with a resolution")
+
+    """
+    The metadata is converted before writing, so that metadata which cannot be converted to JSON
+    raises before the file is changed. The file is written under a temporary name and renamed when
+    it is complete, so an existing file is never replaced by an incomplete one.
+    """
+    json.dumps(metadata)
+    temporaryFilename = str(filename) + ".tmp"
+
+    chunks = []
+    with open(temporaryFilename, "wb") as file:
+        file.write(BINARY_MAGIC)
+        for start in range(0, len(array), chunkSize):
+            chunk = array[start : start + chunkSize]
+            compressed = [
+                _encodeColumn(chunk[:, column], resolution)
+                for column, resolution in enumerate(resolutions)
+            ]
+            chunks.append(
+                {
+                    "offset": file.tell(),
+                    "numberOfPoints": len(chunk),
+                    "minimumTime": float(np.min(chunk[:, 0])),
+                    "maximumTime": float(np.max(chunk[:, 0])),
+                    "resolutions": resolutions,
+                    "sizes": [len(column) for column in compressed],
+                }
+            )
+            for column in compressed:
+                file.write(column)
+
+        indexOffset = file.tell()
+        index = {"metadata": metadata, "chunks": chunks}
+        file.write(json.dumps(index).encode("utf-8"))
+        file.write(struct.pack("<Q", indexOffset))
+        file.write(BINARY_MAGIC)
+    os.replace(temporaryFilename, filename)
+    return
+
+
+def _loadBinaryIndex(file, filename):
+    file.seek(-8 - len(BINARY_MAGIC), os.SEEK_END)
+    indexOffset = struct.unpack("<Q", file.read(8))[0]
+    if file.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError(f"{filename} is not a complete binary track file")
+    file.seek(indexOffset)
+    indexSize = os.fstat(file.fileno()).st_size - indexOffset - 8 - len(BINARY_MAGIC)
+    return json.loads(file.read(indexSize).decode("utf-8"))
+
+
+def loadBinaryMetadata(filename):
+    """Load the metadata of a file written with saveDataAsBinary().
+
+    Only the index at the end of the file is read.
+
+    :param filename: The path and name of the binary file.
+    :returns: The metadata passed to saveDataAsBinary().
+    :rtype: dict
+    """
+    with open(filename, "rb") as file:
+        return _loadBinaryIndex(file, filename)["metadata"]
+
+
+def loadDataFromBinary(filename, startTime=None, endTime=None):
+    """Load a file written with saveDataAsBinary().
+
+    Only the chunks which overlap the time range are read and decompressed.
+
+    :param filename: The path and name of the binary file.
+    :param startTime: Time of the first point to load in s, None to start with the first point.
+    :param endTime: Time of the last point to load in s, None to load up to the last point.
+    :returns: Dictionary with the TrackTypes strings as keys and numpy arrays as values.
+    :rtype: dict
+    """
+    startTime = -np.inf if startTime is None else startTime
+    endTime = np.inf if endTime is None else endTime
+
+    arrays = [np.empty((0, len(TRACK_KEYS)))]
+    with open(filename, "rb") as file:
+        for chunk in _loadBinaryIndex(file, filename)["chunks"]:
+            if chunk["maximumTime"] < startTime or chunk["minimumTime"] > endTime:
+                continue
+            file.seek(chunk["offset"])
+            columns = [
+                _decodeColumn(file.read(size), resolution, chunk["numberOfPoints"])
+                for size, resolution in zip(chunk["sizes"], chunk["resolutions"])
+            ]
+            array = np.column_stack(columns)
+            inRange = (array[:, 0] >= startTime) & (array[:, 0] <= endTime)
+            arrays.append(array[inRange])
+    return arrayToTracks(np.concatenate(arrays))
+
+
+def appendDataToRecording(filename, data, timeOffset=0.0):
+    """Append the points to a recording file.
+
+    The file contains a short header followed by the points as rows of time, voltage and current
+    in 64 bit floats. The points are only appended and never rewritten, so the file stays valid if
+    the script is terminated. An incomplete last row of a terminated write is removed before
+    appending.
+
+    Like saveDataAsText() with append=True the points are written after every primitive, followed
+    by dataReceiver.deletePoints(), so the RAM does not grow with the duration of the measurement.
+    The returned time of the last point is passed as timeOffset for the next part:
+
+    .. code-block:: python
+
+        timeOffset = 0.0
+        for i in range(cycles):
+            ZahnerPP2x2.measurePolarization()
+            timeOffset = appendDataToRecording(
+                "cycles.zrec", dataReceiver.getCompletePoints(), timeOffset
+            )
+            dataReceiver.deletePoints()
+
+    :param filename: The path and name of the recording file.
+    :param data: Dictionary with the TrackTypes strings as keys, like getCompletePoints() returns.
+    :param timeOffset: Time in s which is added to the time track.
+    :returns: The time of the last written point in the file, timeOffset if there are no points.
+    :rtype: float
+    """
+    array = tracksToArray(data)
+    array[:, 0] += timeOffset
+    rowSize = array.itemsize * len(TRACK_KEYS)
+
+    with open(filename, "ab") as file:
+        size = file.seek(0, os.SEEK_END)
+        if size < len(RECORDING_MAGIC):
+            file.truncate(0)
+            file.write(RECORDING_MAGIC)
+        else:
+            completeSize = size - (size - len(RECORDING_MAGIC)) % rowSize
+            if completeSize != size:
+                file.truncate(completeSize)
+        file.write(array.tobytes())
+
+    if len(array) == 0:
+        return float(timeOffset)
+    return float(array[-1, 0])
+
+
+def openRecording(filename):
+    """Open a file written with appendDataToRecording() as memory-mapped arrays.
+
+    The file is not read, only the pages of the accessed points are loaded by the operating
+    system. This way recordings which are larger than the RAM can be analyzed, and opening
+    takes the same time for every size. A recording which is still written can be opened, an
+    incomplete last row is ignored.
+
+    The arrays are read only. They are views of the file and valid as long as they are
+    referenced, a copy is made with numpy.array() if needed.
+
+    :param filename: The path and name of the recording file.
+    :returns: Dictionary with the TrackTypes strings as keys and numpy arrays as values.
+    :rtype: dict
+    """
+    with open(filename, "rb") as file:
+        if file.read(len(RECORDING_MAGIC)) != RECORDING_MAGIC:
+            raise ValueError(f"{filename} is not a recording file")
+        size = os.fstat(file.fileno()).st_size
+
+    numberOfPoints = (size - len(RECORDING_MAGIC)) // (8 * len(TRACK_KEYS))
+    if numberOfPoints == 0:
+        """
+        numpy.memmap cannot map an empty range.
+        """
+        return arrayToTracks(np.empty((0, len(TRACK_KEYS))))
+    array = np.memmap(
+        filename,
+        dtype=np.float64,
+        mode="r",
+        offset=len(RECORDING_MAGIC),
+        shape=(numberOfPoints, len(TRACK_KEYS)),
+    )
+    return arrayToTracks(array)
+
+
+class Segment:
+    """Range of the points recorded during one primitive or method.
+
+    The points of the segment are the points with the indices start to end - 1.
+
+    :param primitive: Name of the primitive or method, for example "charge".
+    :param start: Index of the first point.
+    :param end: Index after the last point.
+    :param parameters: Dictionary with the parameters of the primitive.
+    """
+
+    def __init__(self, primitive, start, end, parameters):
+        self.primitive = primitive
+        self.start = start
+        self.end = end
+        self.parameters = parameters
+
+    def __len__(self):
+        return self.end - self.start
+
+
+class SegmentIndex:
+    """Index with the segments of the primitives in the data of a DataReceiver.
+
+    The number of complete points is read before and after each primitive. The data itself is not
+    copied, so the whole measurement stays in one continuous recording. Later the data of each
+    segment is taken from it as view.
+
+    .. code-block:: python
+
+        segments = SegmentIndex(dataReceiver)
+        with segments.record("charge", cycle=0, current=2.5):
+            ZahnerPP2x2.measureCharge(current=2.5, stopVoltage=2, maximumTime="4 min")
+
+        data = arrayToTracks(tracksToArray(dataReceiver.getCompletePoints()))
+        for segment in segments.getSegments("charge"):
+            chargeData = segments.getSegmentData(data, segment)
+
+    After dataReceiver.deletePoints() the indices no longer match the data and the index must be
+    cleared with clear().
+
+    :param dataReceiver: The DataReceiver of the device.
+    """
+
+    def __init__(self, dataReceiver):
+        self._dataReceiver = dataReceiver
+        self._segments = []
+
+    def __len__(self):
+        return len(self._segments)
+
+    def __getitem__(self, index):
+        return self._segments[index]
+
+    def __iter__(self):
+        return iter(self._segments)
+
+    @contextlib.contextmanager
+    def record(self, primitive, **parameters):
+        """Record the segment of the primitive executed in the with block.
+
+        The segment is also stored if the primitive raises an exception, for example when it was
+        aborted, so that the points measured until then are part of the index.
+
+        :param primitive: Name of the primitive or method, for example "charge".
+        :param parameters: Parameters of the primitive which are stored with the segment.
+        """
+        start = self._dataReceiver.getNumberOfCompletePoints()
+        try:
+            yield
+        finally:
+            self.addSegment(
+                primitive,
+                start,
+                self._dataReceiver.getNumberOfCompletePoints(),
+                **parameters,
+            )
+
+    def addSegment(self, primitive, start, end, **parameters):
+        """Add a segment with known indices.
+
+        :param primitive: Name of the primitive or method, for example "charge".
+        :param start: Index of the first point.
+        :param end: Index after the last point.
+        :param parameters: Parameters of the primitive which are stored with the segment.
+        :returns: The added segment.
+        :rtype: :class:`Segment`
+        """
+        segment = Segment(primitive, start, end, parameters)
+        self._segments.append(segment)
+        return segment
+
+    def getSegments(self, primitive=None):
+        """Iterate over the segments.
+
+        :param primitive: Name of the primitive to iterate only over its segments, None for all.
+        :returns: Iterator over the segments in the order of the measurement.
+        """
+        for segment in self._segments:
+            if primitive is None or segment.primitive == primitive:
+                yield segment
+
+    def clear(self):
+        """Delete all segments."""
+        self._segments = []
+        return
+
+    def getSegmentData(self, data, segment, relativeTime=False):
+        """Get the data of a segment.
+
+        If the tracks of the data are numpy arrays, the returned tracks are views without copy.
+        Lists are converted into arrays first, so the data should be converted once with
+        arrayToTracks(tracksToArray(data)) if it is used for several segments.
+
+        :param data: Dictionary with the TrackTypes strings as keys with the complete data.
+        :param segment: The segment.
+        :param relativeTime: True to start the time track of the segment like the time of a single
+            primitive, relative to the last point before the segment.
+        :returns: Dictionary with the TrackTypes strings as keys and the tracks of the segment.
+        :rtype: dict
+        """
+        segmentData = {
+            key: np.asarray(track)[segment.start : segment.end]
+            for key, track in data.items()
+        }
+        timeKey = TrackTypes.TIME.toString()
+        if relativeTime and segment.start > 0:
+            segmentData[timeKey] = (
+                segmentData[timeKey] - np.asarray(data[timeKey])[segment.start - 1]
+            )
+        return segmentData
+
+
+DEADBAND_WINDOW = 256
+
+
+def _leavesDeadband(array, reference, start, end, bands, maximumInterval):
+    """Mark the points of array[start:end] which leave the deadband around the reference point."""
+    window = array[start:end]
+    leaves = np.zeros(len(window), dtype=bool)
+    for column, absoluteBand, relativeBand in bands:
+        difference = np.abs(window[:, column] - array[reference, column])
+        if absoluteBand is not None:
+            leaves |= difference > absoluteBand
+        if relativeBand is not None:
+            leaves |= difference > relativeBand * abs(array[reference, column])
+    if maximumInterval is not None:
+        leaves |= window[:, 0] - array[reference, 0] >= maximumInterval
+    return leaves
+
+
+def deadbandDecimate(
+    data,
+    absoluteVoltage=None,
+    relativeVoltage=None,
+    absoluteCurrent=None,
+    relativeCurrent=None,
+    maximumInterval=None,
+    segments=None,
+):
+    """Find the points which have to be kept to record the data with a deadband.
+
+    A point is kept if the voltage or the current differs from the last kept point by more than
+    one of the passed bands, so every removed point lies within the bands of the last kept point
+    before it. Additionally a point is kept if maximumInterval has passed since the last kept point.
+
+    The points are compared in windows with numpy, the loop in Python only runs over the kept
+    points. For quiet phases like open circuit rests this is fast, for data in which nearly every
+    point leaves the band the decimation is not useful anyway.
+
+    The first and last point of the data and of each segment, and the minimum and maximum of
+    voltage and current in each segment are always kept. Points which are not contained in any
+    segment are treated like a segment of their own.
+
+    .. code-block:: python
+
+        indices, compressionRatio = deadbandDecimate(data, absoluteVoltage=1e-3, maximumInterval=60)
+        saveDataAsText("ocv.txt", {key: np.asarray(track)[indices] for key, track in data.items()})
+
+    :param data: Dictionary with the TrackTypes strings as keys, like getCompletePoints() returns.
+    :param absoluteVoltage: Absolute voltage band in V, None to disable.
+    :param relativeVoltage: Relative voltage band, for example 0.001 for 0.1 %, None to disable.
+    :param absoluteCurrent: Absolute current band in A, None to disable.
+    :param relativeCurrent: Relative current band, None to disable.
+    :param maximumInterval: Maximum time in s without a kept point, None to disable.
+    :param segments: :class:`SegmentIndex` with the primitives of the data, or None.
+    :returns: Sorted array with the indices of the kept points and the compression ratio, the number
+        of points divided by the number of kept points.
+    :rtype: tuple[numpy.ndarray, float]
+    """
+    array = tracksToArray(data)
+    time, voltage, current = array[:, 0], array[:, 1], array[:, 2]
+    numberOfPoints = len(time)
+    if numberOfPoints == 0:
+        return np.arange(0), 1.0
+
+    bounds = []
+    covered = np.zeros(numberOfPoints, dtype=bool)
+    if segments is not None:
+        for segment in segments:
+            start, end = segment.start, min(segment.end, numberOfPoints)
+            if start < end:
+                bounds.append((start, end))
+                covered[start:end] = True
+
+    """
+    Points which are not contained in a segment, for example of primitives measured outside of
+    SegmentIndex.record(), are decimated as segments of their own.
+    """
+    changes = np.flatnonzero(np.diff(covered.astype(np.int8), prepend=1, append=1))
+    bounds += list(zip(changes[::2], changes[1::2]))
+
+    """
+    The boundaries and extrema of the segments are kept in any case, they are also used as
+    reference for the following points. With the boundaries the first and last point of the data
+    are always kept.
+    """
+    keep = np.zeros(numberOfPoints, dtype=bool)
+    for start, end in bounds:
+        keep[[start, end - 1]] = True
+        for values in [voltage, current]:
+            keep[start + np.argmin(values[start:end])] = True
+            keep[start + np.argmax(values[start:end])] = True
+    forced = np.flatnonzero(keep)
+
+    bands = [
+        (1, absoluteVoltage, relativeVoltage),
+        (2, absoluteCurrent, relativeCurrent),
+    ]
+    reference = forced[0]
+    while reference < numberOfPoints - 1:
+        nextForced = forced[np.searchsorted(forced, reference, side="right")]
+        searchStart = reference + 1
+        windowSize = DEADBAND_WINDOW
+        nextReference = nextForced
+        while searchStart < nextForced:
+            searchEnd = min(searchStart + windowSize, nextForced)
+            leaves = _leavesDeadband(
+                array, reference, searchStart, searchEnd, bands, maximumInterval
+            )
+            if np.any(leaves):
+                nextReference = searchStart + int(np.argmax(leaves))
+                break
+            searchStart = searchEnd
+            windowSize *= 2
+        keep[nextReference] = True
+        reference = nextReference
+
+    indices = np.flatnonzero(keep)
+    return indices, numberOfPoints / len(indices)
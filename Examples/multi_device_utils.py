@@ -0,0 +1,236 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from zahner_potentiostat.scpi_control.searcher import SCPIDeviceSearcher
+from zahner_potentiostat.scpi_control.serial_interface import (
+    SerialCommandInterface,
+    SerialDataInterface,
+)
+from zahner_potentiostat.scpi_control.control import SCPIDevice
+from zahner_potentiostat.scpi_control.error import ZahnerConnectionError
+
+"""
+This module contains functions to measure with several potentiostats from one Python process.
+
+All found devices, or a selection of serial numbers, are connected and the same measurement
+sequence is executed for every device in its own worker thread. The serial communication blocks
+outside of Python, so the devices measure in parallel.
+"""
+
+
+class DeviceResult:
+    """Result of the measurement sequence of one device.
+
+    :param serialNumber: The serial number of the device as string.
+    :param result: The return value of the measurement sequence.
+    :param error: The exception if the sequence failed, otherwise None.
+    """
+
+    def __init__(self, serialNumber, result=None, error=None):
+        self.serialNumber = serialNumber
+        self.result = result
+        self.error = error
+
+    def isSuccessful(self):
+        """Check if the sequence was completed without exception.
+
+        :returns: True if the sequence was completed.
+        :rtype: bool
+        """
+        return self.error is None
+
+
+class DeviceSink:
+    """Sink for the data of one device, which tags everything with the serial number.
+
+    All DeviceSink objects of one run share the same queue. The items are put into the queue
+    as tuple (serialNumber, item).
+
+    :param sharedQueue: The queue shared by all devices.
+    :param serialNumber: The serial number of the device as string.
+    """
+
+    def __init__(self, sharedQueue, serialNumber):
+        self._queue = sharedQueue
+        self._serialNumber = serialNumber
+
+    def put(self, item):
+        """Put an item tagged with the serial number into the shared queue.
+
+        :param item: Arbitrary data, for example the dictionary of getCompletePoints().
+        """
+        self._queue.put((self._serialNumber, item))
+        return
+
+
+def findDevicePorts(serialNumbers=None):
+    """Search the devices and find their command and data ports.
+
+    :param serialNumbers: List with serial numbers as `str` or `int`, None for all found devices.
+    :returns: Two dictionaries, one with the serial number as key and the tuple
+        (commandPort, dataPort) as value and one with the serial number as key and the exception
+        for devices, which were not found.
+    :rtype: tuple[dict, dict]
+    """
+    deviceSearcher = SCPIDeviceSearcher()
+    foundSerialNumbers = deviceSearcher.searchZahnerDevices()
+    if serialNumbers is None:
+        serialNumbers = foundSerialNumbers
+
+    ports = dict()
+    errors = dict()
+    for serialNumber in [str(serialNumber) for serialNumber in serialNumbers]:
+        try:
+            ports[serialNumber] = deviceSearcher.selectDevice(serialNumber)
+        except ZahnerConnectionError as error:
+            errors[serialNumber] = error
+    return ports, errors
+
+
+def openDevice(commandPort, dataPort):
+    """Connect to a device with its command and data port.
+
+    If the connection fails after one of the interfaces was opened, for example because the device
+    does not answer the identification, the opened interfaces are closed again. Otherwise the ports
+    stay blocked and the threads of the interfaces keep the process alive.
+
+    :param commandPort: The command port of the device.
+    :param dataPort: The data port of the device, None to connect without DataReceiver.
+    :returns: The connected device.
+    :rtype: :class:`~zahner_potentiostat.scpi_control.control.SCPIDevice`
+    """
+    commandInterface = SerialCommandInterface(commandPort)
+    try:
+        dataInterface = SerialDataInterface(dataPort) if dataPort is not None else None
+    except:
+        commandInterface.close()
+        raise
+
+    """
+    The object is created before the constructor is called, so that the DataReceiver, which the
+    constructor starts before the identification, is still reachable if the constructor fails.
+    """
+    device = SCPIDevice.__new__(SCPIDevice)
+    try:
+        device.__init__(commandInterface, dataInterface)
+    except:
+        commandInterface.close()
+        try:
+            dataReceiver = device.getDataReceiver()
+        except AttributeError:
+            dataReceiver = None
+        if dataReceiver is not None:
+            """
+            stop() ends the thread of the DataReceiver regularly and closes the data interface.
+            """
+            dataReceiver.stop()
+        elif dataInterface is not None:
+            dataInterface.close()
+        raise
+    return device
+
+
+def runOnDevices(sequence, serialNumbers=None, sharedQueue=None):
+    """Execute a measurement sequence on several devices in parallel.
+
+    The sequence is a function with the signature sequence(device, sink). The device is the connected
+    :class:`~zahner_potentiostat.scpi_control.control.SCPIDevice` and the sink is a
+    :class:`DeviceSink` to pass data to the shared queue during the measurement. The return value
+    of the sequence is stored in the :class:`DeviceResult` of the device.
+
+    An exception in the sequence of one device is stored in its result and does not stop the other
+    devices. After the sequence, or the exception, the connection to the device is closed. An
+    exception while connecting is also stored in the result, an exception while closing is ignored.
+
+    .. code-block:: python
+
+        def sequence(device, sink):
+            device.setSamplingFrequency(10)
+            device.setCoupling(COUPLING.POTENTIOSTATIC)
+            device.setMaximumTimeParameter(15)
+            device.setVoltageParameter(0)
+            device.measurePolarization()
+            sink.put(device.getDataReceiver().getCompletePoints())
+
+        results = runOnDevices(sequence, ["35000", "35001"])
+
+    :param sequence: The function with the measurement sequence.
+    :param serialNumbers: List with serial numbers as `str` or `int`, None for all found devices.
+    :param sharedQueue: Queue into which the sinks put the data, None to create a new queue.
+    :returns: Dictionary with the serial number as key and the :class:`DeviceResult` as value and
+        the shared queue with the data of all devices.
+    :rtype: tuple[dict, queue.Queue]
+    """
+    if sharedQueue is None:
+        sharedQueue = queue.Queue()
+
+    ports, errors = findDevicePorts(serialNumbers)
+    results = {
+        serialNumber: DeviceResult(serialNumber, error=error)
+        for serialNumber, error in errors.items()
+    }
+    if len(ports) == 0:
+        return results, sharedQueue
+
+    with ThreadPoolExecutor(max_workers=len(ports)) as executor:
+        futures = {
+            serialNumber: executor.submit(
+                _runSequence,
+                sequence,
+                serialNumber,
+                commandPort,
+                dataPort,
+                DeviceSink(sharedQueue, serialNumber),
+            )
+            for serialNumber, (commandPort, dataPort) in ports.items()
+        }
+        for serialNumber, future in futures.items():
+            results[serialNumber] = future.result()
+    return results, sharedQueue
+
+
+def _runSequence(sequence, serialNumber, commandPort, dataPort, sink):
+    try:
+        device = openDevice(commandPort, dataPort)
+    except Exception as error:
+        return DeviceResult(serialNumber, error=error)
+
+    try:
+        result = DeviceResult(serialNumber, result=sequence(device, sink))
+    except Exception as error:
+        result = DeviceResult(serialNumber, error=error)
+
+    try:
+        device.close()
+    except Exception:
+        """
+        Closing fails if the connection was already interrupted. The result or the error of the
+        sequence is kept.
+        """
+        pass
+    return result
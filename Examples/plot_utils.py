@@ -0,0 +1,180 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from zahner_potentiostat.scpi_control.datareceiver import TrackTypes
+from data_utils import loadDataFromText
+
+"""
+This module contains functions to plot long measurements fast and with small files.
+
+A plot cannot show more points than it has pixel columns. Therefore the time axis is divided into
+columns and only the first, the last, the minimum and the maximum point of each track are kept in
+every column. The plot looks the same as with all points, the extrema are preserved, but the
+rendering is much faster and vector graphics like SVG or PDF stay small.
+
+matplotlib is only imported when a plot is created, so the module can also be imported on
+computers without a plotting environment.
+"""
+
+DEFAULT_PIXEL_COLUMNS = 2000
+
+
+def decimateMinMax(xData, yDatas, pixelColumns=DEFAULT_PIXEL_COLUMNS):
+    """Find the points which are required to plot the data with the number of pixel columns.
+
+    The x range is divided into pixelColumns columns of equal width. For each column the first and
+    the last point and, for each y track, the points with the minimum and maximum value are kept.
+
+    :param xData: The monotonic x track, usually the time.
+    :param yDatas: List with the y tracks.
+    :param pixelColumns: The number of columns.
+    :returns: Sorted array with the indices of the points to keep.
+    :rtype: numpy.ndarray
+    """
+    xData = np.asarray(xData, dtype=np.float64)
+    numberOfPoints = len(xData)
+    if numberOfPoints <= 4 * pixelColumns:
+        return np.arange(numberOfPoints)
+
+    span = xData[-1] - xData[0]
+    if span > 0:
+        columns = ((xData - xData[0]) / span * pixelColumns).astype(np.int64)
+        columns = np.minimum(columns, pixelColumns - 1)
+    else:
+        columns = np.zeros(numberOfPoints, dtype=np.int64)
+
+    columnStart = np.flatnonzero(np.diff(columns, prepend=-1))
+    columnEnd = np.append(columnStart[1:], numberOfPoints) - 1
+    keep = [columnStart, columnEnd]
+
+    for yData in yDatas:
+        yData = np.asarray(yData, dtype=np.float64)
+        """
+        Sort the points by column and then by value, so the first point of each column in the
+        order is the minimum and the last is the maximum.
+        """
+        order = np.lexsort((yData, columns))
+        keep.append(order[columnStart])
+        keep.append(order[columnEnd])
+    return np.unique(np.concatenate(keep))
+
+
+def plotTIUData(
+    data,
+    filename=None,
+    width=None,
+    height=None,
+    pixelColumns=DEFAULT_PIXEL_COLUMNS,
+):
+    """Plot the voltage and current over time with the decimated data.
+
+    The plot is the same as DataManager.plotTIUData() creates, but only with the points found by
+    decimateMinMax(). With pixelColumns=None all points are plotted.
+
+    :param data: Dictionary with the TrackTypes strings as keys, like getCompletePoints() returns.
+    :param filename: The path, filename and filetype of the file if it should be saved, else None.
+    :param width: The width of the file to save in inch.
+    :param height: The height of the file to save in inch.
+    :param pixelColumns: The number of columns for the decimation.
+    :returns: The plot object.
+    :rtype: :class:`~zahner_potentiostat.display.dcplot.DCPlot`
+    """
+    from zahner_potentiostat.display.dcplot import DCPlot
+
+    x = np.asarray(data[TrackTypes.TIME.toString()], dtype=np.float64)
+    y1 = np.asarray(data[TrackTypes.VOLTAGE.toString()], dtype=np.float64)
+    y2 = np.asarray(data[TrackTypes.CURRENT.toString()], dtype=np.float64)
+
+    if pixelColumns is not None:
+        indices = decimateMinMax(x, [y1, y2], pixelColumns)
+        x, y1, y2 = x[indices], y1[indices], y2[indices]
+
+    display = DCPlot(
+        "Measured Data",
+        "Time",
+        "s",
+        [
+            {"label": "Voltage", "unit": "V", "name": "Voltage"},
+            {"label": "Current", "unit": "A", "name": "Current"},
+        ],
+        [x.tolist(), [y1.tolist(), y2.tolist()]],
+    )
+
+    if filename != None:
+        display.savePlot(filename, width, height)
+    return display
+
+
+def exportPlots(
+    textFilenames,
+    fileType="png",
+    width=10,
+    height=5,
+    pixelColumns=DEFAULT_PIXEL_COLUMNS,
+    processes=None,
+):
+    """Plot many files saved with saveDataAsText() in parallel processes.
+
+    The plot of every text file is saved next to it, with the same name and the passed file type.
+    The plots are rendered without window with the matplotlib backend Agg.
+
+    :param textFilenames: List with the paths of the text files.
+    :param fileType: The file type of the plots, for example "png", "pdf" or "svg".
+    :param width: The width of the plots in inch.
+    :param height: The height of the plots in inch.
+    :param pixelColumns: The number of columns for the decimation.
+    :param processes: The number of worker processes, None for the number of processors.
+    :returns: List with the paths of the saved plots.
+    :rtype: list[str]
+    """
+    plotFilenames = [
+        os.path.splitext(textFilename)[0] + "." + fileType
+        for textFilename in textFilenames
+    ]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(
+                _exportPlot, textFilename, plotFilename, width, height, pixelColumns
+            )
+            for textFilename, plotFilename in zip(textFilenames, plotFilenames)
+        ]
+        for future in futures:
+            future.result()
+    return plotFilenames
+
+
+def _exportPlot(textFilename, plotFilename, width, height, pixelColumns):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    display = plotTIUData(
+        loadDataFromText(textFilename), plotFilename, width, height, pixelColumns
+    )
+    display.close()
+    return
@@ -0,0 +1,145 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import functools
+import numpy as np
+from zahner_potentiostat.drivecycle.cycle_importer import (
+    getNormalisedCurrentTableForHUDDSCOL,
+    getNormalisedCurrentTableForNYCCCOL,
+)
+
+"""
+This module contains functions to prepare profiles for SCPIDevice.measureProfile().
+
+The profiles are processed as two numpy arrays, one with the time points and one with the values.
+Only before the output they are converted into the list of dictionaries required by
+measureProfile().
+
+measureProfile() outputs one primitive for each point. The value of a point is output from its time
+point until the time point of the next point, the value of the last point is not output. Merging
+consecutive points with the same value results in fewer and longer primitives.
+"""
+
+DRIVE_CYCLES = {
+    "NYCCCOL": getNormalisedCurrentTableForNYCCCOL,
+    "HUDDSCOL": getNormalisedCurrentTableForHUDDSCOL,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def getDriveCycle(name):
+    """Get a normalised drive cycle included in the zahner_potentiostat package as arrays.
+
+    The cycle is parsed only at the first call, afterwards the cached arrays are returned.
+    The arrays are read-only, because they are shared between all calls.
+
+    :param name: The name of the drive cycle, "NYCCCOL" or "HUDDSCOL".
+    :returns: Two arrays with the time points and the values.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    time, value = profileToArrays(DRIVE_CYCLES[name]())
+    time.setflags(write=False)
+    value.setflags(write=False)
+    return time, value
+
+
+def profileToArrays(profileDict):
+    """Convert a profile from the measureProfile() structure into arrays.
+
+    :param profileDict: Profile like [{"time": 0, "value": 0.1}, {"time": 1, "value": 0.4}].
+    :returns: Two arrays with the time points and the values.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    time = np.fromiter((point["time"] for point in profileDict), dtype=np.float64)
+    value = np.fromiter((point["value"] for point in profileDict), dtype=np.float64)
+    return time, value
+
+
+def arraysToProfile(time, value):
+    """Convert arrays into the profile structure required by measureProfile().
+
+    :param time: Array with the time points.
+    :param value: Array with the values.
+    :returns: Profile like [{"time": 0, "value": 0.1}, {"time": 1, "value": 0.4}].
+    :rtype: list[dict[str, float]]
+    """
+    return [
+        {"time": pointTime, "value": pointValue}
+        for pointTime, pointValue in zip(
+            np.asarray(time, dtype=np.float64).tolist(),
+            np.asarray(value, dtype=np.float64).tolist(),
+        )
+    ]
+
+
+def resampleProfile(time, value, stepTime, outputPrimitive="pol"):
+    """Resample a profile to a constant step time.
+
+    For the output with polarizations the value of the last point before the new time point is used,
+    as it is output by measureProfile(). For the output with ramps the values are interpolated
+    linearly. The last time point of the profile is always kept.
+
+    :param time: Array with the time points.
+    :param value: Array with the values.
+    :param stepTime: The new time between two points.
+    :param outputPrimitive: "pol" or "ramp" like the parameter of measureProfile().
+    :returns: Two arrays with the new time points and the new values.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    time = np.asarray(time, dtype=np.float64)
+    value = np.asarray(value, dtype=np.float64)
+    newTime = np.arange(time[0], time[-1], stepTime)
+    newTime = np.append(newTime, time[-1])
+
+    if "pol" in outputPrimitive:
+        indices = np.searchsorted(time, newTime, side="right") - 1
+        newValue = value[indices]
+    else:
+        newValue = np.interp(newTime, time, value)
+    return newTime, newValue
+
+
+def mergeEqualProfilePoints(time, value):
+    """Merge consecutive points with the same value into one longer step.
+
+    The points whose value is equal to the value of the previous point are removed. The first and the
+    last point are always kept, so the output with polarizations is not changed, but needs fewer
+    primitives.
+
+    This is only valid for the output with polarizations. With ramps the duration of a step defines
+    the slope of the ramp, which would change.
+
+    :param time: Array with the time points.
+    :param value: Array with the values.
+    :returns: Two arrays with the remaining time points and values.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    time = np.asarray(time, dtype=np.float64)
+    value = np.asarray(value, dtype=np.float64)
+    keep = np.ones(len(value), dtype=bool)
+    keep[1:] = value[1:] != value[:-1]
+    keep[-1] = True
+    return time[keep], value[keep]
@@ -0,0 +1,284 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from data_utils import TRACK_KEYS, arrayToTracks, tracksToArray
+
+"""
+This module contains a ring buffer in shared memory to pass the measured points to other processes.
+
+The measuring process publishes the points into the ring buffer. Any number of consumer processes,
+for example for display, storage or evaluation, attach to the ring buffer by its name and read the
+new points with their own read position. The consumers do not run in the measuring process and
+therefore do not compete with it for the Python interpreter.
+
+There must be only one publishing process. If a consumer reads too slowly, the oldest points are
+overwritten and the number of lost points is reported to the consumer.
+
+The points of a primitive are final after the primitive has ended. Therefore the complete points
+are published after each primitive and then deleted in the DataReceiver, so that each call only
+copies the points of one primitive. After deletePoints() the time of the DataReceiver starts again
+at 0, so the time of the last published point is passed as offset for the next primitive:
+
+.. code-block:: python
+
+    ring = SharedTrackRing.create(10000000)
+    timeOffset = 0.0
+    ZahnerPP2x2.measurePolarization()
+    timeOffset = ring.publish(dataReceiver.getCompletePoints(), timeOffset)
+    dataReceiver.deletePoints()
+
+    # in the consumer process
+    subscriber = TrackSubscriber(ringName)
+    data, lostPoints = subscriber.read()
+"""
+
+HEADER_SIZE = 24
+
+
+def _attachSharedMemory(name):
+    """Attach to an existing shared memory without taking over its ownership.
+
+    Before Python 3.13 every attaching process registers the shared memory at the resource tracker,
+    which deletes it when the process exits, although it belongs to the publisher. Unregistering
+    afterwards is not possible, because forked processes share the resource tracker with the
+    publisher, so the registration is suppressed while attaching.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedTrackRing:
+    """Ring buffer with the time, voltage and current tracks in shared memory.
+
+    The shared memory starts with three 64 bit integers: the number of points written so far, the
+    number of points reserved by the write in progress and the capacity. They are followed by the
+    points as array of 64 bit floats with the shape (capacity, 3).
+
+    Use create() in the publishing process and TrackSubscriber in the consumer processes.
+
+    :param memory: The shared memory.
+    :param owner: True if the object created the shared memory and must delete it.
+    """
+
+    def __init__(self, memory, owner):
+        self._memory = memory
+        self._owner = owner
+        self._header = np.ndarray((3,), dtype=np.int64, buffer=memory.buf)
+        self._capacity = int(self._header[2])
+        self._points = np.ndarray(
+            (self._capacity, len(TRACK_KEYS)),
+            dtype=np.float64,
+            buffer=memory.buf,
+            offset=HEADER_SIZE,
+        )
+
+    @classmethod
+    def create(cls, capacity, name=None):
+        """Create a new ring buffer.
+
+        :param capacity: Number of points which fit into the ring buffer.
+        :param name: Name of the shared memory, None for a random name.
+        :returns: The ring buffer.
+        :rtype: :class:`SharedTrackRing`
+        """
+        memory = shared_memory.SharedMemory(
+            name=name,
+            create=True,
+            size=HEADER_SIZE + capacity * len(TRACK_KEYS) * 8,
+        )
+        header = np.ndarray((3,), dtype=np.int64, buffer=memory.buf)
+        header[0] = 0
+        header[1] = 0
+        header[2] = capacity
+        del header
+        return cls(memory, True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to an existing ring buffer.
+
+        :param name: Name of the shared memory.
+        :returns: The ring buffer.
+        :rtype: :class:`SharedTrackRing`
+        """
+        return cls(_attachSharedMemory(name), False)
+
+    def getName(self):
+        """Get the name of the shared memory, which the consumers need to attach.
+
+        :returns: The name.
+        :rtype: str
+        """
+        return self._memory.name
+
+    def getCapacity(self):
+        """Get the number of points which fit into the ring buffer.
+
+        :returns: The capacity.
+        :rtype: int
+        """
+        return self._capacity
+
+    def getWriteCount(self):
+        """Get the number of points published so far.
+
+        :returns: The number of points.
+        :rtype: int
+        """
+        return int(self._header[0])
+
+    def getReservedCount(self):
+        """Get the number of points published so far including the write in progress.
+
+        Points with an index lower than this count minus the capacity may already be overwritten.
+
+        :returns: The number of points.
+        :rtype: int
+        """
+        return int(self._header[1])
+
+    def publish(self, data, timeOffset=0.0):
+        """Append points to the ring buffer.
+
+        First the points are reserved, then written and then the write counter is increased. So the
+        consumers never read points which are not completely written and can detect points which
+        were overwritten while they were copied.
+
+        :param data: Dictionary with the TrackTypes strings as keys, like getCompletePoints() returns.
+        :param timeOffset: Time in s which is added to the time track.
+        :returns: The time of the last published point, timeOffset if there are no points.
+        :rtype: float
+        """
+        points = tracksToArray(data)
+        points[:, 0] += timeOffset
+        if len(points) == 0:
+            return float(timeOffset)
+        lastTime = float(points[-1, 0])
+        if len(points) > self._capacity:
+            skipped = len(points) - self._capacity
+            points = points[skipped:]
+        else:
+            skipped = 0
+
+        writeCount = self.getWriteCount() + skipped
+        position = writeCount % self._capacity
+        firstPart = min(len(points), self._capacity - position)
+        self._header[1] = writeCount + len(points)
+        self._points[position : position + firstPart] = points[:firstPart]
+        self._points[: len(points) - firstPart] = points[firstPart:]
+        self._header[0] = writeCount + len(points)
+        return lastTime
+
+    def readRange(self, start, end):
+        """Copy the points with the indices start to end - 1 out of the ring buffer.
+
+        :param start: Index of the first point, counted since the creation of the ring buffer.
+        :param end: Index after the last point.
+        :returns: Array with the shape (end - start, 3).
+        :rtype: numpy.ndarray
+        """
+        startPosition = start % self._capacity
+        firstPart = min(end - start, self._capacity - startPosition)
+        return np.concatenate(
+            (
+                self._points[startPosition : startPosition + firstPart],
+                self._points[: end - start - firstPart],
+            )
+        )
+
+    def close(self):
+        """Close the connection to the shared memory.
+
+        The process which created the ring buffer also deletes the shared memory.
+        """
+        self._header = None
+        self._points = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+        return
+
+
+class TrackSubscriber:
+    """Consumer of a ring buffer with its own read position.
+
+    :param name: Name of the shared memory of the ring buffer.
+    :param startAtEnd: True to read only points published after the subscription, False to start
+        with the oldest points still contained in the ring buffer.
+    """
+
+    def __init__(self, name, startAtEnd=False):
+        self._ring = SharedTrackRing.attach(name)
+        self._readCount = self._ring.getWriteCount() if startAtEnd else 0
+
+    def read(self, maximumPoints=None):
+        """Read the points published since the last read.
+
+        :param maximumPoints: Maximum number of points to read, None for all.
+        :returns: Dictionary with the TrackTypes strings as keys and numpy arrays as values and the
+            number of points which were overwritten before they could be read.
+        :rtype: tuple[dict, int]
+        """
+        capacity = self._ring.getCapacity()
+        writeCount = self._ring.getWriteCount()
+        start = max(self._readCount, writeCount - capacity)
+        end = writeCount
+        if maximumPoints is not None:
+            end = min(end, start + maximumPoints)
+        points = self._ring.readRange(start, end)
+
+        """
+        Points overwritten by the publisher while copying are discarded.
+        """
+        overwritten = max(self._ring.getReservedCount() - capacity - start, 0)
+        overwritten = min(overwritten, len(points))
+        points = points[overwritten:]
+
+        lostPoints = start - self._readCount + overwritten
+        self._readCount = end
+        return arrayToTracks(points), lostPoints
+
+    def getNumberOfAvailablePoints(self):
+        """Get the number of points which can be read.
+
+        :returns: The number of points.
+        :rtype: int
+        """
+        return self._ring.getWriteCount() - self._readCount
+
+    def close(self):
+        """Close the connection to the ring buffer."""
+        self._ring.close()
+        return
@@ -0,0 +1,354 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import threading
+import time
+import numpy as np
+from zahner_potentiostat.scpi_control.datareceiver import TrackTypes
+from analysis_utils import cumulativeCharge
+
+"""
+This module contains a monitor to abort primitives with stop conditions evaluated in Python.
+
+The break conditions of the device only compare the measured values with fixed limits. With the
+monitor, arbitrary conditions can be evaluated on the live data. The monitor runs in its own thread
+and evaluates the conditions only on the points received since the last check. If a condition is
+fulfilled, the active primitive is aborted with abortCommand(), which may be called from another
+thread.
+
+The DataReceiver can only return a deep copy of all live points of the active primitive, so every
+check still copies the whole primitive up to now. The checks are skipped while no new points arrive,
+but during a long primitive the effort grows with its duration.
+
+A condition is a function with the signature condition(time, voltage, current). The parameters are
+numpy arrays with the new points and the function returns a boolean array, which is True for the
+points at which the primitive is to be stopped. Conditions which need previous points must keep them
+themselves, like the conditions created by the functions of this module. Such conditions provide a
+function without parameters as attribute reset, which the monitor calls at the start of every
+primitive and when it is started or rearmed.
+"""
+
+
+class StopTrigger:
+    """Information about the point at which a stop condition was fulfilled.
+
+    :param name: The name of the fulfilled condition.
+    :param index: The index of the point in the complete data of the DataReceiver.
+    :param time: The time of the point in s.
+    :param voltage: The voltage of the point in V.
+    :param current: The current of the point in A.
+    """
+
+    def __init__(self, name, index, time, voltage, current):
+        self.name = name
+        self.index = index
+        self.time = time
+        self.voltage = voltage
+        self.current = current
+
+
+class StopConditionMonitor:
+    """Monitor which aborts the active primitive when a stop condition is fulfilled.
+
+    After an abort, the device status must be reset with clearState() before the next primitive
+    can be started. The aborted primitive returns with an error, which is raised if
+    setRaiseOnErrorEnabled(True) was set.
+
+    .. code-block:: python
+
+        monitor = StopConditionMonitor(ZahnerPP2x2)
+        monitor.addCondition("plateau", voltageSlopeCondition(0.001, 10))
+        with monitor:
+            try:
+                ZahnerPP2x2.measurePolarization()
+            except ZahnerSCPIError:
+                ZahnerPP2x2.clearState()
+        print(monitor.getTrigger().index)
+
+    Each check copies all live points of the primitive. For N points in the primitive and a check
+    every interval seconds, a primitive of the duration T copies about N * T / (2 * interval)
+    values in total. For a primitive of several hours with a high sampling frequency the interval
+    should therefore be increased, for example to several seconds, as far as the reaction time of
+    the condition allows. The abort happens at most one interval after the point which fulfills
+    the condition.
+
+    :param device: The connected :class:`~zahner_potentiostat.scpi_control.control.SCPIDevice`.
+    :param interval: Time in s between two checks for new points.
+    """
+
+    def __init__(self, device, interval=0.05):
+        self._device = device
+        self._dataReceiver = device.getDataReceiver()
+        self._interval = interval
+        self._conditions = dict()
+        self._conditionsLock = threading.Lock()
+        self._trigger = None
+        self._processedPoints = 0
+        self._completePoints = None
+        self._lastTime = None
+        self._running = False
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def addCondition(self, name, condition):
+        """Add a stop condition.
+
+        :param name: The name of the condition, which is stored in the trigger.
+        :param condition: The function condition(time, voltage, current), see module documentation.
+        """
+        with self._conditionsLock:
+            self._conditions[name] = condition
+        return
+
+    def removeCondition(self, name):
+        """Remove a stop condition.
+
+        :param name: The name of the condition.
+        """
+        with self._conditionsLock:
+            self._conditions.pop(name, None)
+        return
+
+    def getTrigger(self):
+        """Get the information about the fulfilled condition.
+
+        :returns: The trigger or None, if no condition was fulfilled.
+        :rtype: :class:`StopTrigger`
+        """
+        return self._trigger
+
+    def rearm(self):
+        """Reset the trigger and the state of the conditions, so that they are evaluated again."""
+        self._resetConditions()
+        self._trigger = None
+        return
+
+    def start(self):
+        """Start the monitor thread."""
+        if self._running:
+            return
+        self._resetConditions()
+        self._processedPoints = 0
+        self._completePoints = None
+        self._lastTime = None
+        self._running = True
+        self._thread = threading.Thread(target=self._monitorThread, daemon=True)
+        self._thread.start()
+        return
+
+    def stop(self):
+        """Stop the monitor thread."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return
+
+    def _monitorThread(self):
+        while self._running:
+            if self._trigger is None:
+                self._checkNewPoints()
+            time.sleep(self._interval)
+        return
+
+    def _resetConditions(self):
+        with self._conditionsLock:
+            conditions = list(self._conditions.values())
+        for condition in conditions:
+            reset = getattr(condition, "reset", None)
+            if reset is not None:
+                reset()
+        return
+
+    def _checkNewPoints(self):
+        """Evaluate the conditions on the points received since the last check.
+
+        The live data only contains the points of the active primitive. When a primitive has ended,
+        its points are moved to the complete data and the live data starts again with 0 points, so a
+        change of the number of complete points marks a new primitive.
+
+        At the end of a primitive the DataReceiver may clear the live data and receive all points of
+        the primitive again, before they are moved to the complete data. The points of this replay
+        which are not after the last processed point are skipped.
+
+        getOnlinePoints() copies all live points, only the new points are converted to arrays.
+        """
+        completePoints = self._dataReceiver.getNumberOfCompletePoints()
+        if completePoints != self._completePoints:
+            self._completePoints = completePoints
+            self._processedPoints = 0
+            self._lastTime = None
+            self._resetConditions()
+
+        numberOfPoints = self._dataReceiver.getNumberOfOnlinePoints()
+        if numberOfPoints < self._processedPoints:
+            self._processedPoints = 0
+        if numberOfPoints == self._processedPoints:
+            return
+
+        onlinePoints = self._dataReceiver.getOnlinePoints()
+        if self._dataReceiver.getNumberOfCompletePoints() != completePoints:
+            """
+            The primitive ended while copying, the points are evaluated with the next check.
+            """
+            return
+
+        tracks = [
+            onlinePoints.get(key.toString(), [])
+            for key in [TrackTypes.TIME, TrackTypes.VOLTAGE, TrackTypes.CURRENT]
+        ]
+        numberOfPoints = min(len(track) for track in tracks)
+
+        if numberOfPoints < self._processedPoints:
+            self._processedPoints = 0
+        if numberOfPoints == self._processedPoints:
+            return
+
+        start = self._processedPoints
+        self._processedPoints = numberOfPoints
+        timeChunk, voltageChunk, currentChunk = [
+            np.asarray(track[start:numberOfPoints], dtype=np.float64)
+            for track in tracks
+        ]
+
+        if self._lastTime is not None:
+            skipped = int(np.searchsorted(timeChunk, self._lastTime, "right"))
+            if skipped == len(timeChunk):
+                return
+            start += skipped
+            timeChunk = timeChunk[skipped:]
+            voltageChunk = voltageChunk[skipped:]
+            currentChunk = currentChunk[skipped:]
+        self._lastTime = timeChunk[-1]
+
+        with self._conditionsLock:
+            conditions = list(self._conditions.items())
+
+        firstIndex = None
+        firstName = None
+        for name, condition in conditions:
+            fulfilled = np.flatnonzero(condition(timeChunk, voltageChunk, currentChunk))
+            if len(fulfilled) > 0 and (firstIndex is None or fulfilled[0] < firstIndex):
+                firstIndex = fulfilled[0]
+                firstName = name
+
+        if firstIndex is not None:
+            self._trigger = StopTrigger(
+                firstName,
+                completePoints + start + firstIndex,
+                timeChunk[firstIndex],
+                voltageChunk[firstIndex],
+                currentChunk[firstIndex],
+            )
+            self._device.abortCommand()
+        return
+
+
+def chargeCondition(maximumCharge):
+    """Create a condition which stops when the absolute transferred charge is reached.
+
+    The charge is integrated with the trapezoidal rule over all points of the primitive passed to
+    the condition.
+
+    :param maximumCharge: The absolute charge in C.
+    :returns: The condition function.
+    """
+    state = {"charge": 0.0, "lastTime": None, "lastCurrent": None}
+
+    def condition(time, voltage, current):
+        if state["lastTime"] is None:
+            charge = cumulativeCharge(time, current)
+        else:
+            charge = cumulativeCharge(
+                np.concatenate(([state["lastTime"]], time)),
+                np.concatenate(([state["lastCurrent"]], current)),
+            )[1:]
+        charge += state["charge"]
+
+        state["charge"] = charge[-1]
+        state["lastTime"] = time[-1]
+        state["lastCurrent"] = current[-1]
+        return np.abs(charge) >= maximumCharge
+
+    def reset():
+        state["charge"] = 0.0
+        state["lastTime"] = None
+        state["lastCurrent"] = None
+        return
+
+    condition.reset = reset
+    return condition
+
+
+def voltageSlopeCondition(maximumSlope, duration):
+    """Create a condition which stops when the voltage has reached a plateau.
+
+    The condition is fulfilled at a point when the absolute voltage change since the last point at
+    least duration seconds before, divided by the time between the two points, is smaller than
+    maximumSlope.
+
+    :param maximumSlope: The absolute slope in V/s.
+    :param duration: The minimum time span in s over which the slope is calculated.
+    :returns: The condition function.
+    """
+    history = {"time": np.empty(0), "voltage": np.empty(0)}
+
+    def condition(time, voltage, current):
+        allTime = np.concatenate((history["time"], time))
+        allVoltage = np.concatenate((history["voltage"], voltage))
+        newTime = allTime[len(allTime) - len(time) :]
+        newVoltage = allVoltage[len(allTime) - len(time) :]
+
+        referenceIndex = np.searchsorted(allTime, newTime - duration, "right") - 1
+        valid = referenceIndex >= 0
+        referenceIndex = np.maximum(referenceIndex, 0)
+        timeSpan = newTime - allTime[referenceIndex]
+        voltageChange = np.abs(newVoltage - allVoltage[referenceIndex])
+
+        """
+        Only the points which can be the reference point of future points are kept.
+        """
+        firstKept = max(
+            np.searchsorted(allTime, allTime[-1] - duration, "right") - 1, 0
+        )
+        history["time"] = allTime[firstKept:]
+        history["voltage"] = allVoltage[firstKept:]
+        return valid & (voltageChange < maximumSlope * timeSpan)
+
+    def reset():
+        history["time"] = np.empty(0)
+        history["voltage"] = np.empty(0)
+        return
+
+    condition.reset = reset
+    return condition
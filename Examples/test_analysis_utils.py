@@ -0,0 +1,97 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import numpy as np
+from data_utils import TRACK_KEYS
+from analysis_utils import ChargeIntegrator, charge
+
+"""
+Tests for the functions of analysis_utils, which do not need a connected device.
+"""
+
+
+def makeData(time, voltage, current):
+    return {
+        key: list(np.asarray(track, dtype=np.float64))
+        for key, track in zip(TRACK_KEYS, [time, voltage, current])
+    }
+
+
+def makeConstantCurrent(numberOfPoints, samplingPeriod=1.0, current=1.0):
+    time = np.arange(1, numberOfPoints + 1) * samplingPeriod
+    return makeData(
+        time, np.full(numberOfPoints, 3.7), np.full(numberOfPoints, current)
+    )
+
+
+def testChargeWithStartTime():
+    time = np.arange(1, 11) * 0.1
+    assert np.isclose(charge(time, np.ones(10)), 0.9)
+    assert np.isclose(charge(time, np.ones(10), startTime=0), 1.0)
+    assert charge([], [], startTime=0) == 0.0
+
+
+def testIntegratorMatchesChargeWithStartTime():
+    data = makeConstantCurrent(10, 0.1)
+    integrator = ChargeIntegrator(startTime=0)
+    integrator.update({key: track[:4] for key, track in data.items()})
+    integrator.update(data)
+    expected = charge(data[TRACK_KEYS[0]], data[TRACK_KEYS[2]], startTime=0)
+    assert np.isclose(integrator.getCharge(), expected)
+
+
+def testIntegratorDoesNotCountPointsTwice():
+    data = makeConstantCurrent(100)
+    integrator = ChargeIntegrator()
+    integrator.update({key: track[:30] for key, track in data.items()})
+    integrator.update(data)
+    integrator.update(data)
+    assert np.isclose(integrator.getCharge(), 99)
+
+
+def testIntegratorWithNanInTheLastPoint():
+    data = makeConstantCurrent(10, 0.1)
+    data[TRACK_KEYS[1]][-1] = np.nan
+    integrator = ChargeIntegrator()
+    for i in range(3):
+        integrator.update(data)
+    assert np.isclose(integrator.getCharge(), 0.9)
+
+
+def testIntegratorAfterDeletedPoints():
+    for numberOfNewPoints, expected in [(50, 148), (300, 398)]:
+        integrator = ChargeIntegrator()
+        integrator.update(makeConstantCurrent(100))
+        integrator.pointsDeleted()
+        integrator.update(makeConstantCurrent(numberOfNewPoints))
+        assert np.isclose(integrator.getCharge(), expected)
+
+
+def testIntegratorDetectsDeletedPoints():
+    integrator = ChargeIntegrator(startTime=0)
+    integrator.update(makeConstantCurrent(100))
+    integrator.update(makeConstantCurrent(50, 0.5))
+    assert np.isclose(integrator.getCharge(), 100 + 25)
@@ -0,0 +1,176 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import numpy as np
+import pytest
+from zahner_potentiostat.scpi_control.error import ZahnerConnectionError
+from campaign_utils import Campaign
+from data_utils import TRACK_KEYS, loadDataFromText
+
+"""
+Tests for the Campaign with a simulated device.
+
+The connection to the device is replaced, so the steps, the reconnections and the resumption run
+without a device and without waiting.
+"""
+
+
+class FakeReceiver:
+    def __init__(self):
+        self.points = []
+
+    def getCompletePoints(self):
+        return {
+            key: [point[column] for point in self.points]
+            for column, key in enumerate(TRACK_KEYS)
+        }
+
+    def deletePoints(self):
+        self.points = []
+
+
+class FakeDevice:
+    def __init__(self):
+        self.receiver = FakeReceiver()
+        self.closed = False
+
+    def getDataReceiver(self):
+        return self.receiver
+
+    def close(self):
+        self.closed = True
+
+
+class Crash(Exception):
+    """Simulated termination of the script."""
+
+
+def makeStep(voltage, numberOfPoints=10):
+    def step(device):
+        for i in range(numberOfPoints):
+            device.getDataReceiver().points.append((0.5 * (i + 1), voltage, 0.0))
+
+    return step
+
+
+def makeCampaign(tmp_path, steps, **kwargs):
+    return Campaign(
+        "35000",
+        steps,
+        str(tmp_path / "campaign.json"),
+        str(tmp_path / "campaign.txt"),
+        reconnectInterval=0,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """List with the results of the next connections, a device or an exception."""
+    results = []
+
+    def connect(self):
+        result = results.pop(0) if len(results) > 0 else FakeDevice()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(Campaign, "_connect", connect)
+    return results
+
+
+def testResumeAfterCrashBetweenDataAndCheckpoint(tmp_path, monkeypatch, connections):
+    steps = [(f"step{i}", makeStep(float(i))) for i in range(3)]
+    saveCheckpoint = Campaign._saveCheckpoint
+    savedCheckpoints = []
+
+    def crashingSaveCheckpoint(self, state):
+        """The initial checkpoint and the one of step 0 are saved, then the script crashes."""
+        if len(savedCheckpoints) == 2:
+            raise Crash()
+        savedCheckpoints.append(state["nextStep"])
+        saveCheckpoint(self, state)
+
+    monkeypatch.setattr(Campaign, "_saveCheckpoint", crashingSaveCheckpoint)
+    with pytest.raises(Crash):
+        makeCampaign(tmp_path, steps).run()
+    assert len(loadDataFromText(tmp_path / "campaign.txt")[TRACK_KEYS[0]]) == 20
+
+    monkeypatch.setattr(Campaign, "_saveCheckpoint", saveCheckpoint)
+    campaign = makeCampaign(tmp_path, steps)
+    campaign.run()
+
+    data = loadDataFromText(tmp_path / "campaign.txt")
+    assert np.array_equal(data[TRACK_KEYS[1]], np.repeat([0.0, 1.0, 2.0], 10))
+    assert np.allclose(data[TRACK_KEYS[0]], np.arange(1, 31) * 0.5)
+    segments = campaign.getSegmentIndex().getSegments()
+    assert [(segment.start, segment.end) for segment in segments] == [
+        (0, 10),
+        (10, 20),
+        (20, 30),
+    ]
+
+
+def testDataWithoutCheckpointIsNotOverwritten(tmp_path, connections):
+    (tmp_path / "campaign.txt").write_text("data")
+    with pytest.raises(ValueError):
+        makeCampaign(tmp_path, [("step", makeStep(1.0))]).run()
+    assert (tmp_path / "campaign.txt").read_text() == "data"
+
+
+def testFirstConnectionIsRetried(tmp_path, connections):
+    connections.extend([ZahnerConnectionError("not found")] * 2)
+    campaign = makeCampaign(tmp_path, [("step", makeStep(1.0))])
+    campaign.run()
+    assert campaign.getNumberOfReconnects() == 0
+    assert len(loadDataFromText(tmp_path / "campaign.txt")[TRACK_KEYS[0]]) == 10
+
+
+def testFirstConnectionGivesUp(tmp_path, connections):
+    connections.extend([ZahnerConnectionError("not found")] * 3)
+    campaign = makeCampaign(
+        tmp_path, [("step", makeStep(1.0))], maximumReconnectAttempts=3
+    )
+    with pytest.raises(ZahnerConnectionError):
+        campaign.run()
+
+
+def testInterruptedStepIsRepeated(tmp_path, connections):
+    firstDevice = FakeDevice()
+    connections.append(firstDevice)
+    interrupted = []
+
+    def interruptedStep(device):
+        makeStep(1.0)(device)
+        if len(interrupted) == 0:
+            interrupted.append(True)
+            raise ZahnerConnectionError("connection lost")
+
+    campaign = makeCampaign(tmp_path, [("step", interruptedStep)])
+    campaign.run()
+    assert firstDevice.closed
+    assert campaign.getNumberOfReconnects() == 1
+    assert len(loadDataFromText(tmp_path / "campaign.txt")[TRACK_KEYS[0]]) == 10
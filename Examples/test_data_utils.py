@@ -0,0 +1,219 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import numpy as np
+import pytest
+from data_utils import (
+    TRACK_KEYS,
+    SegmentIndex,
+    appendDataToRecording,
+    deadbandDecimate,
+    loadBinaryMetadata,
+    loadDataFromBinary,
+    loadDataFromText,
+    openRecording,
+    saveDataAsBinary,
+    saveDataAsText,
+)
+
+"""
+Tests for the functions of data_utils, which do not need a connected device.
+
+The tests are executed with pytest in the Examples directory.
+"""
+
+
+def makeData(time, voltage, current):
+    return {
+        key: np.asarray(track, dtype=np.float64)
+        for key, track in zip(TRACK_KEYS, [time, voltage, current])
+    }
+
+
+def makeRest(numberOfPoints, voltage, noise=50e-6, seed=0):
+    generator = np.random.default_rng(seed)
+    return makeData(
+        np.arange(numberOfPoints) * 0.1,
+        voltage + generator.normal(0, noise, numberOfPoints),
+        np.zeros(numberOfPoints),
+    )
+
+
+def lastKeptIndex(indices, numberOfPoints):
+    return indices[np.searchsorted(indices, np.arange(numberOfPoints), "right") - 1]
+
+
+def testDeadbandDoesNotDependOnTheOffset():
+    ratios = [
+        deadbandDecimate(makeRest(50000, voltage), absoluteVoltage=1e-3)[1]
+        for voltage in [3.7, 3.7005]
+    ]
+    assert ratios[0] == ratios[1]
+    assert ratios[0] > 1000
+
+
+def testDeadbandKeepsRemovedPointsWithinTheBand():
+    numberOfPoints = 20000
+    data = makeData(
+        np.arange(numberOfPoints) * 0.1,
+        np.linspace(3.0, 4.0, numberOfPoints),
+        np.sin(np.arange(numberOfPoints) / 500),
+    )
+    indices, _ = deadbandDecimate(
+        data, absoluteVoltage=1e-3, absoluteCurrent=1e-2, maximumInterval=30
+    )
+    last = lastKeptIndex(indices, numberOfPoints)
+    time, voltage, current = [data[key] for key in TRACK_KEYS]
+    assert indices[0] == 0 and indices[-1] == numberOfPoints - 1
+    assert np.all(np.abs(voltage - voltage[last]) <= 1e-3)
+    assert np.all(np.abs(current - current[last]) <= 1e-2)
+    assert np.all(time - time[last] < 30)
+
+
+def testDeadbandWithSegmentNotCoveringTheTail():
+    data = makeRest(100, 3.7)
+    segments = SegmentIndex(None)
+    segments.addSegment("a", 0, 50)
+    indices, compressionRatio = deadbandDecimate(
+        data, absoluteVoltage=1e-3, segments=segments
+    )
+    assert indices[0] == 0
+    assert indices[-1] == 99
+    assert 49 in indices and 50 in indices
+    assert compressionRatio == 100 / len(indices)
+
+
+def testDeadbandWithSegmentNotCoveringTheStart():
+    data = makeRest(100, 3.7)
+    data[TRACK_KEYS[1]][5] = 4.0
+    segments = SegmentIndex(None)
+    segments.addSegment("a", 20, 100)
+    indices, _ = deadbandDecimate(data, absoluteVoltage=1e-3, segments=segments)
+    assert indices[0] == 0
+    assert 5 in indices
+    assert 19 in indices and 20 in indices
+
+
+def testDeadbandWithoutPoints():
+    indices, compressionRatio = deadbandDecimate(makeData([], [], []))
+    assert len(indices) == 0
+    assert compressionRatio == 1.0
+
+
+def testTextRoundTrip(tmp_path):
+    data = makeRest(1000, 3.7)
+    filename = tmp_path / "data.txt"
+    saveDataAsText(filename, data)
+    loaded = loadDataFromText(filename)
+    for key in TRACK_KEYS:
+        assert np.array_equal(loaded[key], data[key])
+
+
+def testTextAppendWithTimeOffset(tmp_path):
+    filename = tmp_path / "data.txt"
+    timeOffset = 0.0
+    for i in range(3):
+        timeOffset = saveDataAsText(
+            filename, makeData([1.0, 2.0], [1.0, 1.0], [0.0, 0.0]), True, timeOffset
+        )
+    assert timeOffset == 6.0
+    assert np.array_equal(loadDataFromText(filename)[TRACK_KEYS[0]], [1, 2, 3, 4, 5, 6])
+
+
+def testTextWithIncompleteLastLine(tmp_path):
+    filename = tmp_path / "data.txt"
+    saveDataAsText(filename, makeRest(10, 3.7))
+    with open(filename, "r+b") as file:
+        file.truncate(file.seek(0, 2) - 20)
+    assert len(loadDataFromText(filename)[TRACK_KEYS[0]]) == 9
+
+
+def testBinaryIsLossless(tmp_path):
+    data = makeData(
+        np.arange(1000) * 0.1,
+        np.linspace(3.0, 4.0, 1000),
+        np.where(np.arange(1000) < 500, 1.0, 1e-6),
+    )
+    data[TRACK_KEYS[1]][10] = np.nan
+    filename = tmp_path / "data.ztr"
+    saveDataAsBinary(filename, data, {"serialNumber": "35000"}, chunkSize=100)
+    loaded = loadDataFromBinary(filename)
+    for key in TRACK_KEYS:
+        assert np.array_equal(loaded[key], data[key], equal_nan=True)
+    assert loadBinaryMetadata(filename) == {"serialNumber": "35000"}
+
+
+def testBinaryTimeRange(tmp_path):
+    time = np.arange(1000) * 0.1
+    time[350] = 15.0
+    data = makeData(time, np.zeros(1000), np.zeros(1000))
+    filename = tmp_path / "data.ztr"
+    saveDataAsBinary(filename, data, chunkSize=100)
+    loaded = loadDataFromBinary(filename, 10, 20)[TRACK_KEYS[0]]
+    assert np.array_equal(loaded, time[(time >= 10) & (time <= 20)])
+
+
+def testBinaryWithInvalidMetadataKeepsTheFile(tmp_path):
+    filename = tmp_path / "data.ztr"
+    saveDataAsBinary(filename, makeRest(10, 3.7), {"run": 1})
+    with pytest.raises(TypeError):
+        saveDataAsBinary(filename, makeRest(1000, 3.7), {"run": np.float32(2)})
+    assert loadBinaryMetadata(filename) == {"run": 1}
+    assert len(loadDataFromBinary(filename)[TRACK_KEYS[0]]) == 10
+
+
+def testRecordingAppendWithTimeOffset(tmp_path):
+    filename = tmp_path / "data.zrec"
+    first = makeRest(1000, 3.7)
+    second = makeRest(500, 3.8, seed=1)
+    timeOffset = appendDataToRecording(filename, first)
+    timeOffset = appendDataToRecording(filename, second, timeOffset)
+
+    loaded = openRecording(filename)
+    assert isinstance(loaded[TRACK_KEYS[0]].base, np.memmap)
+    assert len(loaded[TRACK_KEYS[0]]) == 1500
+    assert loaded[TRACK_KEYS[0]][-1] == timeOffset == 99.9 + 49.9
+    for key in TRACK_KEYS[1:]:
+        assert np.array_equal(loaded[key], np.concatenate([first[key], second[key]]))
+
+
+def testRecordingWithIncompleteLastRow(tmp_path):
+    filename = tmp_path / "data.zrec"
+    data = makeRest(100, 3.7)
+    appendDataToRecording(filename, data)
+    with open(filename, "ab") as file:
+        file.write(b"\x00" * 12)
+
+    assert len(openRecording(filename)[TRACK_KEYS[0]]) == 100
+    appendDataToRecording(filename, data)
+    loaded = openRecording(filename)
+    assert np.array_equal(loaded[TRACK_KEYS[1]][100:], data[TRACK_KEYS[1]])
+
+
+def testRecordingWithoutPoints(tmp_path):
+    filename = tmp_path / "data.zrec"
+    appendDataToRecording(filename, makeRest(0, 3.7))
+    assert len(openRecording(filename)[TRACK_KEYS[0]]) == 0
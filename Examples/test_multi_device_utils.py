@@ -0,0 +1,118 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import queue
+import threading
+import pytest
+import multi_device_utils
+from zahner_potentiostat.scpi_control.error import ZahnerConnectionError
+
+"""
+Tests for the connection handling of multi_device_utils with simulated serial interfaces.
+
+The real SCPIDevice and DataReceiver of the package are used, only the serial interfaces are
+replaced, so no device is needed.
+"""
+
+
+class FakeCommandInterface:
+    instances = []
+
+    def __init__(self, port):
+        self.closed = False
+        FakeCommandInterface.instances.append(self)
+
+    def sendStringAndWaitForReplyString(self, *args, **kwargs):
+        raise ZahnerConnectionError("no answer")
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDataInterface:
+    instances = []
+
+    def __init__(self, port):
+        self.closed = False
+        self.queue = queue.SimpleQueue()
+        FakeDataInterface.instances.append(self)
+
+    def readBytes(self, numberOfBytes, timeout=None):
+        bytesRead = bytearray()
+        for i in range(numberOfBytes):
+            byte = self.queue.get(timeout=timeout)
+            if byte is None:
+                break
+            bytesRead.append(byte)
+        return bytesRead
+
+    def close(self):
+        self.closed = True
+        self.queue.put(None)
+
+
+@pytest.fixture
+def fakeInterfaces(monkeypatch):
+    FakeCommandInterface.instances = []
+    FakeDataInterface.instances = []
+    monkeypatch.setattr(
+        multi_device_utils, "SerialCommandInterface", FakeCommandInterface
+    )
+    monkeypatch.setattr(multi_device_utils, "SerialDataInterface", FakeDataInterface)
+    threadErrors = []
+    monkeypatch.setattr(threading, "excepthook", threadErrors.append)
+    return threadErrors
+
+
+def testFailedConnectionClosesEverything(fakeInterfaces):
+    threadsBefore = threading.active_count()
+    with pytest.raises(ZahnerConnectionError):
+        multi_device_utils.openDevice("COM1", "COM2")
+
+    assert FakeCommandInterface.instances[0].closed
+    assert FakeDataInterface.instances[0].closed
+    assert threading.active_count() == threadsBefore
+    assert fakeInterfaces == []
+
+
+def testCloseErrorKeepsTheResult(monkeypatch):
+    class Device:
+        def close(self):
+            raise ZahnerConnectionError("already disconnected")
+
+    monkeypatch.setattr(multi_device_utils, "openDevice", lambda *ports: Device())
+    result = multi_device_utils._runSequence(
+        lambda device, sink: 42, "35000", "COM1", "COM2", None
+    )
+    assert result.isSuccessful() and result.result == 42
+
+    def failingSequence(device, sink):
+        raise ValueError("sequence failed")
+
+    result = multi_device_utils._runSequence(
+        failingSequence, "35000", "COM1", "COM2", None
+    )
+    assert isinstance(result.error, ValueError)
@@ -0,0 +1,112 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import numpy as np
+import pytest
+from data_utils import TRACK_KEYS
+from shared_memory_utils import SharedTrackRing, TrackSubscriber
+
+"""
+Tests for the ring buffer in shared memory.
+
+The publisher and the subscriber are used in the same process, the shared memory is the same as
+between processes.
+"""
+
+
+def makeData(numberOfPoints, firstValue=0):
+    values = np.arange(firstValue, firstValue + numberOfPoints, dtype=np.float64)
+    return {key: values * factor for key, factor in zip(TRACK_KEYS, [0.1, 1.0, -1.0])}
+
+
+@pytest.fixture
+def ring():
+    ring = SharedTrackRing.create(100)
+    yield ring
+    ring.close()
+
+
+@pytest.fixture
+def subscriber(ring):
+    subscriber = TrackSubscriber(ring.getName())
+    yield subscriber
+    subscriber.close()
+
+
+def testPublishWithTimeOffset(ring, subscriber):
+    timeOffset = ring.publish(makeData(10))
+    timeOffset = ring.publish(makeData(10), timeOffset)
+    assert timeOffset == pytest.approx(1.8)
+
+    data, lostPoints = subscriber.read()
+    assert lostPoints == 0
+    assert np.allclose(np.diff(data[TRACK_KEYS[0]]), [0.1] * 9 + [0.0] + [0.1] * 9)
+    assert np.array_equal(data[TRACK_KEYS[1]], np.tile(np.arange(10.0), 2))
+    assert subscriber.getNumberOfAvailablePoints() == 0
+
+
+def testPublishWithoutPoints(ring, subscriber):
+    assert ring.publish(makeData(0), 5.0) == 5.0
+    assert len(subscriber.read()[0][TRACK_KEYS[0]]) == 0
+
+
+def testReadAcrossTheEndOfTheRing(ring, subscriber):
+    ring.publish(makeData(80))
+    subscriber.read()
+    ring.publish(makeData(50, 80))
+
+    data, lostPoints = subscriber.read()
+    assert lostPoints == 0
+    assert np.array_equal(data[TRACK_KEYS[1]], np.arange(80.0, 130.0))
+
+
+def testSlowSubscriberLosesTheOldestPoints(ring, subscriber):
+    ring.publish(makeData(60))
+    ring.publish(makeData(250, 60))
+
+    data, lostPoints = subscriber.read()
+    assert lostPoints == 210
+    assert np.array_equal(data[TRACK_KEYS[1]], np.arange(210.0, 310.0))
+
+
+def testReadWithMaximumPoints(ring, subscriber):
+    ring.publish(makeData(30))
+    first, _ = subscriber.read(maximumPoints=20)
+    second, _ = subscriber.read()
+    assert np.array_equal(first[TRACK_KEYS[1]], np.arange(20.0))
+    assert np.array_equal(second[TRACK_KEYS[1]], np.arange(20.0, 30.0))
+
+
+def testSubscriberStartingAtTheEnd(ring):
+    ring.publish(makeData(30))
+    subscriber = TrackSubscriber(ring.getName(), startAtEnd=True)
+    try:
+        ring.publish(makeData(5, 30))
+        data, lostPoints = subscriber.read()
+    finally:
+        subscriber.close()
+    assert lostPoints == 0
+    assert np.array_equal(data[TRACK_KEYS[1]], np.arange(30.0, 35.0))
@@ -0,0 +1,180 @@
+"""
+  ____       __                        __    __   __      _ __
+ /_  / ___ _/ /  ___  ___ ___________ / /__ / /__/ /_____(_) /__
+  / /_/ _ `/ _ \/ _ \/ -_) __/___/ -_) / -_)  '_/ __/ __/ /  '_/
+ /___/\_,_/_//_/_//_/\__/_/      \__/_/\__/_/\_\\__/_/ /_/_/\_\
+
+Copyright 2023 Zahner-Elektrik GmbH & Co. KG
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the Software
+is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included
+in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH
+THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import numpy as np
+from zahner_potentiostat.scpi_control.datareceiver import TrackTypes
+from stop_condition_utils import (
+    StopConditionMonitor,
+    chargeCondition,
+    voltageSlopeCondition,
+)
+
+"""
+Tests for the stop condition monitor with a simulated DataReceiver.
+
+The checks of the monitor are called directly instead of in the monitor thread, so the order of
+the received points and the checks is deterministic.
+"""
+
+KEYS = [
+    TrackTypes.TIME.toString(),
+    TrackTypes.VOLTAGE.toString(),
+    TrackTypes.CURRENT.toString(),
+]
+
+
+class FakeReceiver:
+    """DataReceiver which receives points like the package does.
+
+    The time continues over the primitives. At the end of a primitive its points are moved from the
+    live data to the complete data, optionally after a replay of all points of the primitive.
+    """
+
+    def __init__(self):
+        self.online = {key: [] for key in KEYS}
+        self.complete = {key: [] for key in KEYS}
+        self.primitive = []
+        self.timeOffset = 0.0
+
+    def receive(self, time, voltage, current):
+        point = (self.timeOffset + time, voltage, current)
+        self.primitive.append(point)
+        for key, value in zip(KEYS, point):
+            self.online[key].append(value)
+
+    def replay(self):
+        self.online = {key: [] for key in KEYS}
+        for point in self.primitive:
+            for key, value in zip(KEYS, point):
+                self.online[key].append(value)
+
+    def endPrimitive(self):
+        for key in KEYS:
+            self.complete[key].extend(self.online[key])
+        self.online = {key: [] for key in KEYS}
+        self.timeOffset = self.primitive[-1][0]
+        self.primitive = []
+
+    def getNumberOfOnlinePoints(self):
+        return len(self.online[KEYS[0]])
+
+    def getNumberOfCompletePoints(self):
+        return len(self.complete[KEYS[0]])
+
+    def getOnlinePoints(self):
+        return {key: list(track) for key, track in self.online.items()}
+
+
+class FakeDevice:
+    def __init__(self):
+        self.receiver = FakeReceiver()
+        self.aborts = 0
+
+    def getDataReceiver(self):
+        return self.receiver
+
+    def abortCommand(self):
+        self.aborts += 1
+
+
+def measure(monitor, receiver, times, current=1.0, voltage=3.7):
+    for time in times:
+        receiver.receive(time, voltage, current)
+        if monitor.getTrigger() is None:
+            monitor._checkNewPoints()
+
+
+def testChargeConditionStartsAgainInEveryPrimitive():
+    device = FakeDevice()
+    monitor = StopConditionMonitor(device)
+    monitor.addCondition("charge", chargeCondition(10))
+    monitor._checkNewPoints()
+
+    measure(monitor, device.receiver, np.arange(1, 9))
+    device.receiver.endPrimitive()
+    measure(monitor, device.receiver, np.arange(1, 9))
+    assert monitor.getTrigger() is None
+
+    measure(monitor, device.receiver, np.arange(9, 13))
+    assert monitor.getTrigger().time == device.receiver.timeOffset + 11
+    assert device.aborts == 1
+
+
+def testRearmResetsTheConditions():
+    device = FakeDevice()
+    monitor = StopConditionMonitor(device)
+    monitor.addCondition("charge", chargeCondition(5))
+    monitor._checkNewPoints()
+
+    measure(monitor, device.receiver, np.arange(1, 8))
+    assert monitor.getTrigger() is not None
+    device.receiver.endPrimitive()
+
+    monitor.rearm()
+    measure(monitor, device.receiver, np.arange(1, 4))
+    assert monitor.getTrigger() is None
+
+
+def testReplayAtTheEndOfThePrimitiveIsSkipped():
+    device = FakeDevice()
+    monitor = StopConditionMonitor(device)
+    monitor.addCondition("charge", chargeCondition(10))
+    monitor._checkNewPoints()
+
+    measure(monitor, device.receiver, np.arange(1, 9))
+    device.receiver.receive(9, 3.7, 1.0)
+    device.receiver.receive(10, 3.7, 1.0)
+    device.receiver.replay()
+    monitor._checkNewPoints()
+    assert monitor.getTrigger() is None
+
+    device.receiver.receive(11, 3.7, 1.0)
+    monitor._checkNewPoints()
+    trigger = monitor.getTrigger()
+    assert trigger.time == 11
+    assert trigger.index == 10
+
+
+def testVoltageSlopeConditionStartsAgainInEveryPrimitive():
+    device = FakeDevice()
+    monitor = StopConditionMonitor(device)
+    monitor.addCondition("plateau", voltageSlopeCondition(0.001, 5))
+    monitor._checkNewPoints()
+
+    measure(monitor, device.receiver, np.arange(1, 4), voltage=3.7)
+    device.receiver.endPrimitive()
+    measure(monitor, device.receiver, np.arange(1, 4), voltage=3.7)
+    assert monitor.getTrigger() is None
+
+    measure(monitor, device.receiver, np.arange(4, 8), voltage=3.7)
+    assert monitor.getTrigger().time == device.receiver.timeOffset + 6
+
+
+def testConditionReset():
+    condition = chargeCondition(1.5)
+    assert np.any(condition(np.arange(3.0), np.zeros(3), np.ones(3)))
+    condition.reset()
+    assert np.any(condition(np.arange(2.0), np.zeros(2), np.ones(2))) == False